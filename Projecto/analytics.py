@@ -2,14 +2,27 @@
 import csv
 import json
 import time
+import hashlib
 from datetime import datetime, timedelta
 from collections import defaultdict
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional, Iterable, Iterator
 import argparse
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))  # pacote shared/
+from shared.rules import RuleEngine, OutOfOrderError, load_rules, describe_rule
+from shared.columns import EventTable, count_by, distinct_by, numpy_enabled
+from shared.expiry import purge_expired
+from shared import journal
 
 LOG_PATH = "logs_exemplo.csv"
 BLACKLIST_PATH = "blacklist.json"
+ANALYTICS_STATE_PATH = "analytics_state.json"  # checkpoint do modo --incremental
+ANALYTICS_STATE_VERSION = 2
+RULES_PATH = "rules.json"  # opcional: regras declarativas que substituem os parâmetros abaixo
+HEAD_FINGERPRINT_BYTES = 4096  # bytes iniciais usados para detetar reescrita do log
+MAX_LATENESS = 5.0  # s: falhas até tanto fora de ordem (lotes do BufferedLog de vários processos) são aceites
 
 # --- Parâmetros das regras (ajusta se necessário)
 SHORT_FAILS = 10              # >=10 falhas
@@ -25,26 +38,52 @@ SCATTERED_BLOCK_SECS = 60 * 60  # bloqueio 1h
 
 # --------------------- Utils de I/O ---------------------
 
-def load_logs() -> List[Dict[str, str]]:
+def iter_logs() -> Iterator[Dict[str, str]]:
+    # Gera as linhas uma a uma, sem materializar o ficheiro em memória
     if not os.path.exists(LOG_PATH):
         raise FileNotFoundError(f"Ficheiro de logs não encontrado: {LOG_PATH}")
-    rows: List[Dict[str, str]] = []
-    with open(LOG_PATH, newline="", encoding="utf-8") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            rows.append(row)
-    return rows
+    return _iter_csv(LOG_PATH)
 
-def save_blacklist(bl: Dict[str, Dict[str, Any]]) -> None:
-    with open(BLACKLIST_PATH, "w", encoding="utf-8") as f:
+def _iter_csv(path: str) -> Iterator[Dict[str, str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+def load_logs() -> List[Dict[str, str]]:
+    return list(iter_logs())
+
+def parse_log_lines(lines: Iterable[str], header: str) -> Iterator[Tuple[float, str, str, str]]:
+    # (ts, username, ip, result) de linhas de dados do CSV; usada pelos processos de leitura paralela
+    fields = next(csv.reader([header]))
+    for r in csv.DictReader(lines, fieldnames=fields):
+        yield parse_ts(r["timestamp"]), r["username"], r["ip"], r["result"]
+
+def load_columns(rows: Optional[Iterable[Dict[str, str]]] = None, workers: int = 1) -> EventTable:
+    # Versão compacta de load_logs(): ~20 bytes por linha em vez de um dict por linha.
+    # Com workers > 1, o ficheiro é lido em paralelo por intervalos de bytes (shared/ingest.py)
+    if rows is None and workers > 1:
+        from shared.ingest import read_table_parallel
+        if not os.path.exists(LOG_PATH):
+            raise FileNotFoundError(f"Ficheiro de logs não encontrado: {LOG_PATH}")
+        return read_table_parallel(LOG_PATH, parse_log_lines, workers)
+    table = EventTable()
+    for r in (iter_logs() if rows is None else rows):
+        table.append(parse_ts(r["timestamp"]), r["username"], r["ip"], r["result"])
+    return table
+
+def _write_snapshot(bl: Dict[str, Dict[str, Any]]) -> None:
+    tmp = BLACKLIST_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(bl, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, BLACKLIST_PATH)
+
+def save_blacklist(bl: Dict[str, Dict[str, Any]]) -> None:
+    # Blacklist de load_blacklist(): só as entradas alteradas vão para o journal
+    # (blacklist.journal.jsonl, uma linha cada); o snapshot blacklist.json é
+    # reescrito apenas na compactação periódica (shared/journal.py)
+    journal.save_blacklist(bl, BLACKLIST_PATH, _write_snapshot)
 
 def load_blacklist() -> Dict[str, Dict[str, Any]]:
-    try:
-        with open(BLACKLIST_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+    return journal.read_blacklist(BLACKLIST_PATH)
 
 # Aceita "2025-11-30T14:03:31.519413" ou "2025-11-30T14:03:31.519413Z"
 def parse_ts(ts: str) -> float:
@@ -55,96 +94,235 @@ def iso_utc(ts_seconds: float) -> str:
     return datetime.utcfromtimestamp(ts_seconds).isoformat()
 
 # --------------------- Motor de regras ---------------------
+# As regras são declarativas (ver shared/rules.py) e avaliadas todas numa só
+# passagem pelos eventos. Se existir RULES_PATH, os limiares vêm desse ficheiro.
 
-def apply_rules(rows: List[Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
-    now = time.time()
+def default_rules() -> List[Dict[str, Any]]:
+    return [
+        {"name": "short_bruteforce", "count": SHORT_FAILS, "window": SHORT_WINDOW_MIN * 60,
+         "action": "temp", "block_secs": SHORT_BLOCK_SECS},
+        {"name": "long_bruteforce", "count": LONG_FAILS, "window": LONG_WINDOW_H * 3600,
+         "action": "perm"},
+        {"name": "scattered_users", "count": SCATTERED_USERS, "window": SCATTERED_WINDOW_MIN * 60,
+         "distinct": "user", "action": "temp", "block_secs": SCATTERED_BLOCK_SECS},
+    ]
+
+def new_engine() -> RuleEngine:
+    return RuleEngine(load_rules(RULES_PATH, default_rules()), fields=("user",), max_lateness=MAX_LATENESS)
+
+def temp_block(reason: str, now: float, secs: int) -> Dict[str, Any]:
+    return {
+        "type": "temporary",
+        "reason": reason,
+        "since": now,
+        "until": now + secs,
+        "since_human": iso_utc(now),
+        "until_human": iso_utc(now + secs),
+    }
+
+def perm_block(reason: str, now: float) -> Dict[str, Any]:
+    return {
+        "type": "permanent",
+        "reason": reason,
+        "since": now,
+        "since_human": iso_utc(now),
+    }
+
+def block_fired(bl: Dict[str, Dict[str, Any]], ip: str, fired: List[Dict[str, Any]], now: float) -> None:
+    # Por ordem de declaração; um bloqueio temporário nunca sobrepõe um permanente
+    for rule in fired:
+        reason = describe_rule(rule)
+        if rule["action"] == "perm":
+            bl[ip] = perm_block(reason, now)
+        elif ip not in bl or bl[ip]["type"] != "permanent":
+            bl[ip] = temp_block(reason, now, rule["block_secs"])
+
+def feed_rules(engine: RuleEngine, rows) -> None:
+    # Só as falhas contam; ordenação estável por ts (empates mantêm a ordem do ficheiro)
+    if isinstance(rows, EventTable):
+        ips, users = rows.ips.values, rows.users.values
+        fails = [(ts, ips[ip], users[u]) for ts, ip, u in rows.select(fail_codes(rows))]
+    else:
+        fails = [(parse_ts(r["timestamp"]), r["ip"], r["username"]) for r in rows if r["result"].startswith("fail")]
+    fails.sort(key=lambda x: x[0])
+    for ts, ip, user in fails:
+        engine.feed(ip, ts, (user,))
+
+def fired_vectorized(table: EventTable) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    # Mesmos disparos (e ordem) que feed_rules + engine.fired_items(), via NumPy
+    from shared.windows import detect_table
+    ips = table.ips.values
+    fired = detect_table(table, fail_codes(table), load_rules(RULES_PATH, default_rules()))
+    return [(ips[c], rules) for c, (rules, _last) in fired.items()]
+
+def fired_parallel(table: EventTable, workers: int) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    # IPs repartidos por `workers` processos (shared/parallel.py); mesmo resultado
+    from shared.parallel import evaluate_sharded
+    ips = table.ips.values
+    fired = evaluate_sharded(table, fail_codes(table), load_rules(RULES_PATH, default_rules()), workers)
+    return [(ips[c], rules) for c, (rules, _last) in fired.items()]
+
+def block_until(entry: Dict[str, Any]) -> Optional[float]:
+    # Fim de um bloqueio temporário (login_cli trata um "temporary" sem until como expirado)
+    return entry.get("until", 0) if entry.get("type") == "temporary" else None
+
+def blacklist_from(fired_items: Iterable[Tuple[str, List[Dict[str, Any]]]], now: float) -> Dict[str, Dict[str, Any]]:
     bl = load_blacklist()
+    for ip, fired in fired_items:
+        block_fired(bl, ip, fired, now)
+    # Os temporários já expirados saem na mesma escrita: a blacklist só guarda bloqueios ativos
+    purge_expired(bl, block_until, now)
+    return bl
 
-    # ip -> [(ts, user, result)]
-    by_ip: Dict[str, List[Tuple[float, str, str]]] = defaultdict(list)
+def apply_rules(rows, engine: Optional[RuleEngine] = None, workers: int = 1) -> Dict[str, Dict[str, Any]]:
+    # rows: lista de linhas do CSV ou EventTable. Para uma EventTable sem motor
+    # dado: workers > 1 -> processos em paralelo; senão, com NumPy, deteção vetorizada
+    now = time.time()
+    if engine is None and isinstance(rows, EventTable):
+        if workers > 1:
+            return blacklist_from(fired_parallel(rows, workers), now)
+        if numpy_enabled():
+            return blacklist_from(fired_vectorized(rows), now)
+    if engine is None:
+        engine = new_engine()
+    feed_rules(engine, rows)
+    return blacklist_from(engine.fired_items(), now)
+
+def analyze_stream(rows: Iterable[Dict[str, str]], engine: Optional[RuleEngine] = None) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    """Estatísticas + regras numa só passagem pelas linhas (pode ser um gerador).
+
+    A memória depende do nº de IPs ativos e não do nº de linhas. Como não há
+    ordenação, as linhas têm de vir por ordem temporal (como o log é escrito):
+    uma falha até MAX_LATENESS segundos mais antiga do que a última do mesmo IP
+    conta no instante dessa última; com um atraso maior, o motor levanta
+    OutOfOrderError.
+    """
+    now = time.time()
+    if engine is None:
+        engine = new_engine()
+    acc = LogStats()
     for row in rows:
-        ts = parse_ts(row["timestamp"])
-        by_ip[row["ip"]].append((ts, row["username"], row["result"]))
-
-    for ip, events in by_ip.items():
-        events.sort(key=lambda x: x[0])
-
-        # Lista de timestamps de falhas
-        fails_ts = [ts for ts, _, res in events if res.startswith("fail")]
-
-        # --- Regra 1: >=10 falhas em 5 min (bloqueio 1h)
-        window_5m = SHORT_WINDOW_MIN * 60
-        i = 0
-        for j in range(len(fails_ts)):
-            while fails_ts[j] - fails_ts[i] > window_5m:
-                i += 1
-            if (j - i + 1) >= SHORT_FAILS:
-                bl[ip] = {
-                    "type": "temporary",
-                    "reason": f">={SHORT_FAILS} fails/{SHORT_WINDOW_MIN}m",
-                    "since": now,
-                    "until": now + SHORT_BLOCK_SECS,
-                    "since_human": iso_utc(now),
-                    "until_human": iso_utc(now + SHORT_BLOCK_SECS),
-                }
-                break  # já bloqueado por esta regra
-
-        # --- Regra 2: >=30 falhas em 24h (bloqueio permanente)
-        window_24h = LONG_WINDOW_H * 3600
-        i = 0
-        for j in range(len(fails_ts)):
-            while fails_ts[j] - fails_ts[i] > window_24h:
-                i += 1
-            if (j - i + 1) >= LONG_FAILS:
-                bl[ip] = {
-                    "type": "permanent",
-                    "reason": f">={LONG_FAILS} fails/{LONG_WINDOW_H}h",
-                    "since": now,
-                    "since_human": iso_utc(now),
-                }
-                break
-
-        # --- Regra 3: >=5 utilizadores distintos em 10 min (bloqueio 1h)
-        fails = [(ts, user) for ts, user, res in events if res.startswith("fail")]
-        window_10m = SCATTERED_WINDOW_MIN * 60
-        i = 0
-        for j in range(len(fails)):
-            tsj, _ = fails[j]
-            while tsj - fails[i][0] > window_10m:
-                i += 1
-            distinct_users = len(set(u for _, u in fails[i:j+1]))
-            if distinct_users >= SCATTERED_USERS:
-                # Não sobrepor permanente
-                if ip not in bl or bl[ip]["type"] != "permanent":
-                    bl[ip] = {
-                        "type": "temporary",
-                        "reason": f">={SCATTERED_USERS} users/{SCATTERED_WINDOW_MIN}m",
-                        "since": now,
-                        "until": now + SCATTERED_BLOCK_SECS,
-                        "since_human": iso_utc(now),
-                        "until_human": iso_utc(now + SCATTERED_BLOCK_SECS),
-                    }
-                break
+        acc.add(row)
+        if row["result"].startswith("fail"):
+            engine.feed(row["ip"], parse_ts(row["timestamp"]), (row["username"],))
+    return blacklist_from(engine.fired_items(), now), acc.result()
 
-    return bl
+# --------------------- Modo incremental (checkpoint) ---------------------
+# O estado guarda o offset (em bytes) já processado no log e o estado do motor
+# de regras: por IP, só a janela recente [ts / (user, ts)] de que as regras por
+# disparar ainda precisam, mais as regras já disparadas. Cada execução lê só as
+# linhas novas e o resultado é o mesmo de um reprocessamento completo.
+
+def new_analytics_state() -> Dict[str, Any]:
+    return {"version": ANALYTICS_STATE_VERSION, "offset": 0, "head": "", "engine": {}}
+
+def load_analytics_state() -> Dict[str, Any]:
+    try:
+        with open(ANALYTICS_STATE_PATH, "r", encoding="utf-8") as f:
+            st = json.load(f)
+    except FileNotFoundError:
+        return new_analytics_state()
+    if st.get("version") != ANALYTICS_STATE_VERSION:
+        return new_analytics_state()
+    return st
+
+def save_analytics_state(st: Dict[str, Any]) -> None:
+    tmp = ANALYTICS_STATE_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(st, f, ensure_ascii=False)
+    os.replace(tmp, ANALYTICS_STATE_PATH)
+
+def _head_fingerprint(f, upto: int) -> str:
+    f.seek(0)
+    return hashlib.sha1(f.read(min(upto, HEAD_FINGERPRINT_BYTES))).hexdigest()
+
+def log_cursor_valid(offset: int, head: str) -> bool:
+    # False se o log foi truncado ou reescrito desde que o checkpoint foi gravado
+    if not os.path.exists(LOG_PATH):
+        raise FileNotFoundError(f"Ficheiro de logs não encontrado: {LOG_PATH}")
+    with open(LOG_PATH, "rb") as f:
+        f.readline()
+        data_start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        return data_start <= offset <= size and _head_fingerprint(f, offset) == head
+
+def iter_log_from(cursor: Dict[str, Any]) -> Iterator[Dict[str, str]]:
+    """Gera as linhas completas a partir de cursor["offset"] (0 = início do log).
+
+    cursor["offset"] avança à medida que as linhas são lidas e cursor["head"]
+    é atualizado no fim. Uma linha parcial (ainda a ser escrita) fica para a
+    próxima execução.
+    """
+    with open(LOG_PATH, "rb") as f:
+        fields = next(csv.reader([f.readline().decode("utf-8")]))
+        cursor["offset"] = max(cursor["offset"], f.tell())
+        f.seek(cursor["offset"])
+
+        def complete_lines() -> Iterator[str]:
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break
+                cursor["offset"] += len(raw)
+                yield raw.decode("utf-8")
+
+        yield from csv.DictReader(complete_lines(), fieldnames=fields)
+        cursor["head"] = _head_fingerprint(f, cursor["offset"])
+
+def run_incremental() -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    st = load_analytics_state()
+    engine = new_engine()
+    cursor = {"offset": st["offset"], "head": st["head"]}
+    if not log_cursor_valid(cursor["offset"], cursor["head"]) or not engine.load_state(st["engine"]):
+        # Log reescrito/truncado ou regras alteradas: reprocessar desde o início
+        engine = new_engine()
+        cursor = {"offset": 0, "head": ""}
+    new_from = cursor["offset"]  # as linhas novas começam aqui
+    try:
+        bl, s = analyze_stream(iter_log_from(cursor), engine)
+    except OutOfOrderError:
+        # Registos fora de ordem temporal: reprocessar tudo (ordenado) para garantir o mesmo resultado;
+        # as estatísticas continuam a ser só das linhas novas
+        engine = new_engine()
+        cursor = {"offset": 0, "head": ""}
+        table = load_columns(iter_log_from(cursor))
+        bl = apply_rules(table, engine)
+        s = stats(iter_log_from({"offset": new_from, "head": ""}))
+    # IPs sem disparos e sem eventos dentro da maior janela saem do checkpoint; os que dispararam ficam,
+    # porque blacklist_from volta a aplicá-los e a blacklist tem de ser a de uma análise completa
+    engine.prune()
+    st = new_analytics_state()
+    st["offset"], st["head"], st["engine"] = cursor["offset"], cursor["head"], engine.export_state()
+    save_blacklist(bl)
+    save_analytics_state(st)
+    return bl, s
 
 # --------------------- Estatísticas ---------------------
 
-def stats(rows: List[Dict[str, str]]) -> Dict[str, Any]:
-    total = len(rows)
-    by_result: Dict[str, int] = defaultdict(int)
-    fail_count_by_ip: Dict[str, int] = defaultdict(int)
-    attacked_users_by_ip: Dict[str, set] = defaultdict(set)
+class LogStats:
+    """Acumulador de stats() linha a linha (memória proporcional ao nº de IPs)."""
 
-    for r in rows:
-        by_result[r["result"]] += 1
+    def __init__(self):
+        self.total = 0
+        self.by_result: Dict[str, int] = defaultdict(int)
+        self.fail_count_by_ip: Dict[str, int] = defaultdict(int)
+        self.attacked_users_by_ip: Dict[str, set] = defaultdict(set)
+
+    def add(self, r: Dict[str, str]) -> None:
+        self.total += 1
+        self.by_result[r["result"]] += 1
         if r["result"].startswith("fail"):
-            fail_count_by_ip[r["ip"]] += 1
-            attacked_users_by_ip[r["ip"]].add(r["username"])
+            self.fail_count_by_ip[r["ip"]] += 1
+            self.attacked_users_by_ip[r["ip"]].add(r["username"])
+
+    def result(self) -> Dict[str, Any]:
+        distinct = {ip: len(users) for ip, users in self.attacked_users_by_ip.items()}
+        return stats_summary(self.total, self.by_result, self.fail_count_by_ip, distinct)
 
+def stats_summary(total: int, by_result: Dict[str, int], fail_count_by_ip: Dict[str, int],
+                  distinct_users_by_ip: Dict[str, int]) -> Dict[str, Any]:
     top_ips_by_fails = sorted(fail_count_by_ip.items(), key=lambda x: x[1], reverse=True)[:10]
     ips_by_distinct_users = sorted(
-        ((ip, len(users)) for ip, users in attacked_users_by_ip.items()),
+        distinct_users_by_ip.items(),
         key=lambda x: x[1],
         reverse=True
     )[:10]
@@ -156,6 +334,26 @@ def stats(rows: List[Dict[str, str]]) -> Dict[str, Any]:
         "ips_by_distinct_users_attacked": ips_by_distinct_users,
     }
 
+def stats(rows: Iterable[Dict[str, str]]) -> Dict[str, Any]:
+    acc = LogStats()
+    for r in rows:
+        acc.add(r)
+    return acc.result()
+
+def fail_codes(table: EventTable) -> set:
+    return table.results.codes_where(lambda r: r.startswith("fail"))
+
+def stats_columns(table: EventTable) -> Dict[str, Any]:
+    # Mesmo resultado de stats(), calculado sobre as colunas de códigos
+    fails = fail_codes(table)
+    ips, results = table.ips.values, table.results.values
+    return stats_summary(
+        len(table),
+        {results[c]: n for c, n in count_by(table.result).items()},
+        {ips[c]: n for c, n in count_by(table.ip, table.result, fails).items()},
+        {ips[c]: n for c, n in distinct_by(table.ip, table.user, table.result, fails).items()},
+    )
+
 # --------------------- CLI / Main ---------------------
 
 def main():
@@ -165,14 +363,43 @@ def main():
         action="store_true",
         help="Imprime datas legíveis (UTC) ao apresentar a blacklist atualizada."
     )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=f"Processa só as linhas novas desde a última execução (estado em {ANALYTICS_STATE_PATH})."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Lê o log e avalia as regras em N processos (IPs repartidos por hash); o resultado é o mesmo."
+    )
     args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers tem de ser >= 1")
+    if args.incremental and args.workers > 1:
+        parser.error("--workers não se aplica ao modo --incremental")
 
-    rows = load_logs()
-    bl = apply_rules(rows)
-    save_blacklist(bl)
+    if args.incremental:
+        bl, s = run_incremental()
+        title = "=== Estatísticas (linhas novas) ==="
+    elif args.workers > 1:
+        table = load_columns(workers=args.workers)
+        bl, s = apply_rules(table, workers=args.workers), stats_columns(table)
+        save_blacklist(bl)
+        title = "=== Estatísticas ==="
+    else:
+        try:
+            bl, s = analyze_stream(iter_logs())
+        except OutOfOrderError:
+            # Log fora de ordem temporal: análise em memória (colunar), ordenada por tempo
+            table = load_columns()
+            bl, s = apply_rules(table), stats_columns(table)
+        save_blacklist(bl)
+        title = "=== Estatísticas ==="
 
-    s = stats(rows)
-    print("=== Estatísticas ===")
+    print(title)
     print(json.dumps(s, indent=2, ensure_ascii=False))
 
     print("\n=== Blacklist atualizada ===")
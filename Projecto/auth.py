@@ -1,6 +1,9 @@
-import os, hmac, hashlib, base64
+import os, hmac, hashlib, base64, sys
 from typing import Tuple
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))  # pacote shared/
+from shared.kdfpool import default_pool
+
 # Parâmetros recomendados (podem ser ajustados no README)
 PBKDF2_ITERATIONS = 200_000
 DKLEN = 32  # 256 bits
@@ -15,4 +18,9 @@ def hash_password(password: str, salt_b64: str) -> str:
 
 def verify_password(password: str, salt_b64: str, pwd_hash_b64: str) -> bool:
     expected = hash_password(password, salt_b64)
-    return hmac.compare_digest(expected, pwd_hash_b64)
\ No newline at end of file
+    return hmac.compare_digest(expected, pwd_hash_b64)
+
+async def verify_password_async(password: str, salt_b64: str, pwd_hash_b64: str) -> bool:
+    # verify_password no pool de threads (shared/kdfpool.py): o PBKDF2 liberta o GIL,
+    # por isso verificações em simultâneo correm em paralelo, sem bloquear o event loop
+    return await default_pool().run(verify_password, password, salt_b64, pwd_hash_b64)
@@ -1,8 +1,13 @@
-import csv, json, time, argparse, getpass, os, ipaddress
+import csv, time, argparse, getpass, os, ipaddress, sys
 from datetime import datetime, timedelta
-from typing import Tuple
+from typing import Any, Callable, Dict, Tuple
 from auth import gen_salt, hash_password, verify_password
-from storage import get_user, upsert_user, get_state, save_state
+from storage import get_user, upsert_user, get_lockout, update_lockout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))  # pacote shared/
+from shared.buflog import BufferedLog
+from shared.iptrie import cached_blacklist_index
+from shared.journal import read_blacklist
 
 LOG_PATH = "logs_exemplo.csv"
 BLACKLIST_PATH = "blacklist.json"
@@ -14,32 +19,31 @@ MAX_BACKOFF = 15 * 60
 
 CSV_HEADERS = ["timestamp", "username", "ip", "result"]
 
-def ensure_csv():
-    if not os.path.exists(LOG_PATH):
-        with open(LOG_PATH, "w", newline="", encoding="utf-8") as f:
-            csv.writer(f).writerow(CSV_HEADERS)
-
 def load_blacklist():
-    if not os.path.exists(BLACKLIST_PATH):
-        return {}
-    with open(BLACKLIST_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    # Snapshot + journal (ver analytics.save_blacklist)
+    return read_blacklist(BLACKLIST_PATH)
 
 def is_ip_blocked(ip: str) -> Tuple[bool, str]:
-    bl = load_blacklist()
+    # Blacklist em cache no processo (só volta a ser lida se o snapshot ou o journal mudarem),
+    # indexada por IP e por rede CIDR ("203.0.113.0/24"); a entrada mais específica primeiro
+    bl = cached_blacklist_index(BLACKLIST_PATH)
     now = time.time()
-    if ip in bl:
-        entry = bl[ip]
+    for _key, entry in bl.matches(ip):
         if entry["type"] == "permanent":
             return True, "permanent"
         elif entry["type"] == "temporary" and now < entry.get("until", 0):
             return True, "temporary"
     return False, ""
 
+# Tentativas em fila, gravadas em lote por um thread de fundo (cabeçalho se o CSV for novo)
+_attempts = BufferedLog(LOG_PATH, header=",".join(CSV_HEADERS) + "\r\n")
+
 def record_attempt(username: str, ip: str, result: str):
-    ensure_csv()
-    with open(LOG_PATH, "a", newline="", encoding="utf-8") as f:
-        csv.writer(f).writerow([datetime.utcnow().isoformat(), username, ip, result])
+    csv.writer(_attempts).writerow([datetime.utcnow().isoformat(), username, ip, result])
+
+def flush_attempts():
+    # Grava já (com fsync) as tentativas em fila; também corre à saída do processo
+    _attempts.flush()
 
 def valid_ip(ip: str) -> bool:
     try:
@@ -56,54 +60,53 @@ def create_user():
     upsert_user(username, salt, pwd_hash)
     print(f"Utilizador '{username}' criado.")
 
-def login():
-    username = input("Username: ").strip()
-    ip = input("IP origem (ex.: 10.0.0.1): ").strip()
-    if not valid_ip(ip):
-        print("IP inválido.")
-        return
+def _add_fail(ustate: Dict[str, Any], now: float) -> Dict[str, Any]:
+    # Sobre o estado relido sob lock (storage.update_lockout), não sobre a cópia lida antes do PBKDF2
+    fails = ustate["fails"] + 1
+    return {"fails": fails, "next_allowed": now + min(MAX_BACKOFF, BASE_BACKOFF * (2 ** (fails - 1)))}
 
+def login_attempt(username: str, ip: str, read_password: Callable[[], str]) -> Tuple[str, str]:
+    # Lógica de uma tentativa, sem terminal: devolve (resultado registado no log, mensagem).
+    # read_password só é chamado se a password for mesmo verificada.
     blocked, btype = is_ip_blocked(ip)
     if blocked:
-        print(f"Acesso rejeitado: IP em blacklist ({btype}).")
         record_attempt(username, ip, f"blocked_{btype}")
-        return
+        return f"blocked_{btype}", f"Acesso rejeitado: IP em blacklist ({btype})."
 
     user = get_user(username)
-    state = get_state()
-    ustate = state.setdefault(username, {"fails": 0, "next_allowed": 0})
+    # Estado de lockout à parte das credenciais: uma falha não reescreve users.json
+    ustate = get_lockout(username)
 
     now = time.time()
     if now < ustate["next_allowed"]:
         wait = int(ustate["next_allowed"] - now)
-        print(f"Conta temporariamente bloqueada (backoff). Tenta novamente em {wait}s.")
         record_attempt(username, ip, "local_lockout")
-        return
+        return "local_lockout", f"Conta temporariamente bloqueada (backoff). Tenta novamente em {wait}s."
 
     if not user:
         # user inexistente também conta como falha
         record_attempt(username, ip, "fail_no_user")
-        ustate["fails"] += 1
-        backoff = min(MAX_BACKOFF, BASE_BACKOFF * (2 ** (ustate["fails"] - 1)))
-        ustate["next_allowed"] = now + backoff
-        save_state(state)
-        print("Credenciais inválidas.")
-        return
+        update_lockout(username, lambda st: _add_fail(st, now))
+        return "fail_no_user", "Credenciais inválidas."
 
-    pwd = getpass.getpass("Password: ").strip()
+    pwd = read_password()
     if verify_password(pwd, user["salt"], user["hash"]):
-        print("Login bem-sucedido.")
         record_attempt(username, ip, "success")
-        ustate["fails"] = 0
-        ustate["next_allowed"] = 0
-        save_state(state)
+        update_lockout(username, lambda st: {"fails": 0, "next_allowed": 0})
+        return "success", "Login bem-sucedido."
     else:
         record_attempt(username, ip, "fail_bad_pwd")
-        ustate["fails"] += 1
-        backoff = min(MAX_BACKOFF, BASE_BACKOFF * (2 ** (ustate["fails"] - 1)))
-        ustate["next_allowed"] = now + backoff
-        save_state(state)
-        print("Credenciais inválidas.")
+        update_lockout(username, lambda st: _add_fail(st, now))
+        return "fail_bad_pwd", "Credenciais inválidas."
+
+def login():
+    username = input("Username: ").strip()
+    ip = input("IP origem (ex.: 10.0.0.1): ").strip()
+    if not valid_ip(ip):
+        print("IP inválido.")
+        return
+    _result, msg = login_attempt(username, ip, lambda: getpass.getpass("Password: ").strip())
+    print(msg)
 
 def main():
     p = argparse.ArgumentParser(description="Login seguro + logging + lockout/backoff + blacklist")
@@ -1,8 +1,15 @@
-import json, time, os
-from typing import Dict, Any, Optional
+import json, time, os, sys
+from typing import Callable, Dict, Any, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))  # pacote shared/
+from shared.locking import json_transaction
+from shared.lockout import LockoutFile
 
 USERS_DB = "users.json"
-STATE_DB = "state.json"  # falhas consecutivas por utilizador, timestamps, etc.
+STATE_DB = "state.json"  # formato antigo do estado de lockout (importado para o LOCKOUT_DB)
+LOCKOUT_DB = "lockout.bin"  # falhas consecutivas e next_allowed por utilizador (shared/lockout.py)
+
+_lockout = LockoutFile(LOCKOUT_DB)
 
 def _load(path: str) -> Dict[str, Any]:
     if not os.path.exists(path):
@@ -10,21 +17,35 @@ def _load(path: str) -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def _save(path: str, data: Dict[str, Any]) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-
 def get_user(username: str) -> Optional[Dict[str, Any]]:
     users = _load(USERS_DB)
     return users.get(username)
 
 def upsert_user(username: str, salt_b64: str, pwd_hash_b64: str) -> None:
-    users = _load(USERS_DB)
-    users[username] = {"salt": salt_b64, "hash": pwd_hash_b64, "created_at": int(time.time())}
-    _save(USERS_DB, users)
+    # Ler-alterar-gravar sob lock: dois processos a criar utilizadores não se apagam um ao outro
+    with json_transaction(USERS_DB) as users:
+        users[username] = {"salt": salt_b64, "hash": pwd_hash_b64, "created_at": int(time.time())}
+
+def _lockout_file() -> LockoutFile:
+    # Na 1.ª utilização, o state.json antigo (se existir) passa para o ficheiro binário
+    if not os.path.exists(LOCKOUT_DB):
+        for username, ustate in _load(STATE_DB).items():
+            _lockout.put(username, ustate.get("fails", 0), ustate.get("next_allowed", 0))
+        _lockout.ensure()
+    return _lockout
 
-def get_state() -> Dict[str, Any]:
-    return _load(STATE_DB)
+def get_lockout(username: str) -> Dict[str, Any]:
+    # Estado de lockout de um utilizador (um pread), sem tocar em users.json
+    st = _lockout_file().get(username)
+    if st is None:
+        return {"fails": 0, "next_allowed": 0}
+    return {"fails": st[0], "next_allowed": st[1]}
 
-def save_state(state: Dict[str, Any]) -> None:
-    _save(STATE_DB, state)
\ No newline at end of file
+def update_lockout(username: str, fn: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Dict[str, Any]:
+    # Ler-alterar-gravar do slot sob o lock do lockout.bin: falhas de vários
+    # processos ao mesmo tempo somam todas
+    def apply(st):
+        new = fn({"fails": 0, "next_allowed": 0} if st is None else {"fails": st[0], "next_allowed": st[1]})
+        return new["fails"], new["next_allowed"], 0.0
+    fails, next_allowed, _ = _lockout_file().update(username, apply)
+    return {"fails": fails, "next_allowed": next_allowed}
@@ -1,16 +1,32 @@
 
 from __future__ import annotations
-from collections import defaultdict, deque
+import hashlib
+import json
+import os
+import sys
+from collections import defaultdict
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Tuple, Iterable
-from storage import LOG_FILE, get_blacklist, put_blacklist
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from storage import BASE_DIR, LOG_FILE, get_blacklist, put_blacklist, purge_expired_blocks
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # pacote shared/
+from shared.locking import file_lock
+from shared.rules import OutOfOrderError, RuleEngine, load_rules
+from shared.timeparse import make_ts_decoder
+from shared.columns import EventTable, count_by, numpy_enabled
+
+RULES_FILE = BASE_DIR / "rules.json"
+STATE_FILE = BASE_DIR / "analyzer_state.json"  # offset lido + janelas por IP (IncrementalAnalyzer)
+STATE_VERSION = 1
+HEAD_FINGERPRINT_BYTES = 4096  # bytes iniciais usados para detetar reescrita do log
+READ_BATCH = 65536  # linhas por lote ao pôr a leitura em dia
+MAX_LATENESS = 5.0  # s: falhas até tanto fora de ordem não obrigam a refazer a análise
 
 DTFMT = "%Y-%m-%d %H:%M:%S%z"
 
-def _parse_row(row: List[str]):
-    # timestamp,username,ip,result
-    ts_s, username, ip, result = row
-    # normalize timestamp to aware datetime
+def _parse_ts(ts_s: str) -> float:
+    # normalize timestamp to aware datetime -> epoch
     try:
         dt = datetime.strptime(ts_s, DTFMT)
     except ValueError:
@@ -18,29 +34,57 @@ def _parse_row(row: List[str]):
         dt = datetime.fromisoformat(ts_s)
         if dt.tzinfo is None:
             dt = dt.replace(tzinfo=timezone.utc)
-    return dt, username, ip, result.strip().upper()
+    return dt.timestamp()
+
+def _parse_row(row: List[str], decode_ts=_parse_ts):
+    # timestamp,username,ip,result -> (epoch UTC, username, ip, RESULT)
+    ts_s, username, ip, result = row
+    return decode_ts(ts_s), username, ip, result.strip().upper()
 
-def read_logs() -> List[Tuple[datetime, str, str, str]]:
-    recs = []
+def parse_log_lines(lines, _header: str = "") -> Iterable[Tuple[float, str, str, str]]:
+    # (epoch UTC, username, ip, RESULT) para cada linha de dados válida
+    decode_ts = None
+    for line in lines:
+        parts = line.strip().split(",")
+        if len(parts) < 4:
+            continue
+        if decode_ts is None:
+            # formato detetado na 1.ª linha (parser ISO em C em vez de strptime)
+            decode_ts = make_ts_decoder(parts[0], _parse_ts, naive_utc=True)
+        yield _parse_row(parts[:4], decode_ts)
+
+def _iter_log_rows():
     if not LOG_FILE.exists():
-        return recs
+        return
     with LOG_FILE.open("r", encoding="utf-8") as f:
         next(f, None)  # skip header
-        for line in f:
-            parts = line.strip().split(",")
-            if len(parts) < 4:
-                continue
-            recs.append(_parse_row(parts[:4]))
-    return recs
+        yield from parse_log_lines(f)
+
+def read_logs() -> List[Tuple[float, str, str, str]]:
+    return list(_iter_log_rows())
+
+def read_events(workers: int = 1) -> EventTable:
+    # Igual a read_logs(), mas em colunas compactas (~20 bytes por linha);
+    # com workers > 1 o ficheiro é lido em paralelo por intervalos de bytes
+    if workers > 1 and LOG_FILE.exists():
+        from shared.ingest import read_table_parallel
+        return read_table_parallel(str(LOG_FILE), parse_log_lines, workers)
+    table = EventTable()
+    for ts, user, ip, res in _iter_log_rows():
+        table.append(ts, user, ip, res)
+    return table
 
 def analyze(recs) -> Dict[str, any]:
+    # recs: lista de read_logs() ou EventTable de read_events()
+    if isinstance(recs, EventTable):
+        return _analyze_columns(recs)
     # Basic stats
     per_ip_fail = defaultdict(int)
     per_user_fail = defaultdict(int)
     total = len(recs)
     fail = 0
     success = 0
-    for dt, user, ip, res in recs:
+    for _ts, user, ip, res in recs:
         if res == "FAIL":
             fail += 1
             per_ip_fail[ip] += 1
@@ -55,71 +99,263 @@ def analyze(recs) -> Dict[str, any]:
         "per_user_fail": dict(sorted(per_user_fail.items(), key=lambda x: x[1], reverse=True)),
     }
 
-def detect_and_block(recs) -> Dict[str, dict]:
-    # Rules:
+def _analyze_columns(table: EventTable) -> Dict[str, any]:
+    fail = table.results.codes_where(lambda r: r == "FAIL")
+    success = table.results.codes_where(lambda r: r == "SUCCESS")
+    per_result = count_by(table.result)
+    ips, users = table.ips.values, table.users.values
+    per_ip_fail = {ips[c]: n for c, n in count_by(table.ip, table.result, fail).items()}
+    per_user_fail = {users[c]: n for c, n in count_by(table.user, table.result, fail).items()}
+    return {
+        "total": len(table),
+        "success": sum(per_result.get(c, 0) for c in success),
+        "fail": sum(per_result.get(c, 0) for c in fail),
+        "per_ip_fail": dict(sorted(per_ip_fail.items(), key=lambda x: x[1], reverse=True)),
+        "per_user_fail": dict(sorted(per_user_fail.items(), key=lambda x: x[1], reverse=True)),
+    }
+
+def _fail_events(recs) -> List[Tuple[float, str, str]]:
+    if isinstance(recs, EventTable):
+        fail = recs.results.codes_where(lambda r: r == "FAIL")
+        ips, users = recs.ips.values, recs.users.values
+        return [(ts, users[u], ips[ip]) for ts, ip, u in recs.select(fail)]
+    return [(ts, user, ip) for ts, user, ip, res in recs if res == "FAIL"]
+
+def block_record(fired, last_ts: float) -> dict:
+    # Permanente prevalece; temporário dura o maior block_secs a partir da última falha
+    if any(r["action"] == "perm" for r in fired):
+        return {"type": "perm"}
+    secs = max(r["block_secs"] for r in fired)
+    until = datetime.fromtimestamp(last_ts, timezone.utc) + timedelta(seconds=secs)
+    return {"type": "temp", "until": until.isoformat()}
+
+def _detect_engine(recs, rules) -> Dict[str, dict]:
+    engine = RuleEngine(rules, fields=("user",))
+    fails = _fail_events(recs)
+    fails.sort(key=lambda x: x[0])
+    last_fail = {}
+    # Uma única passagem avalia todas as regras para todos os IPs
+    for ts, user, ip in fails:
+        engine.feed(ip, ts, (user,))
+        last_fail[ip] = ts
+    return {ip: block_record(fired, last_fail[ip]) for ip, fired in engine.fired_items()}
+
+def _detect_vectorized(table: EventTable, rules) -> Dict[str, dict]:
+    # Janelas por IP com searchsorted sobre as colunas ordenadas (shared/windows.py)
+    from shared.windows import detect_table
+    fail = table.results.codes_where(lambda r: r == "FAIL")
+    ips = table.ips.values
+    return {ips[c]: block_record(fired, last_ts)
+            for c, (fired, last_ts) in detect_table(table, fail, rules).items()}
+
+def _detect_parallel(table: EventTable, rules, workers: int) -> Dict[str, dict]:
+    # IPs repartidos por `workers` processos (shared/parallel.py)
+    from shared.parallel import evaluate_sharded
+    fail = table.results.codes_where(lambda r: r == "FAIL")
+    ips = table.ips.values
+    return {ips[c]: block_record(fired, last_ts)
+            for c, (fired, last_ts) in evaluate_sharded(table, fail, rules, workers).items()}
+
+def detect_and_block(recs, rules=None, workers: int = 1) -> Dict[str, dict]:
+    # Rules (declarativas, ver shared/rules.py; rules.json substitui as predefinidas):
     # 1) >= 10 FAIL in 5 minutes -> temp block 1h
     # 2) >= 30 FAIL in 24h -> permanent
     # 3) >= 5 distinct users attacked by same IP in 10 minutes -> temp 1h
-    by_ip = defaultdict(list)
-    for dt, user, ip, res in recs:
-        if res == "FAIL":
-            by_ip[ip].append((dt, user))
-    to_block = {}
-    for ip, events in by_ip.items():
-        events.sort(key=lambda x: x[0])
-        # Sliding windows
-        q5 = deque()
-        q24 = deque()
-        q10_users = deque()
-        users_window = defaultdict(int)
-        perm = False
-        temp = False
-        for dt, user in events:
-            # maintain 5 min window
-            while q5 and (dt - q5[0]).total_seconds() > 5*60:
-                q5.popleft()
-            q5.append(dt)
-            # maintain 24h window
-            while q24 and (dt - q24[0]).total_seconds() > 24*3600:
-                q24.popleft()
-            q24.append(dt)
-            # maintain 10 min window of users
-            while q10_users and (dt - q10_users[0][0]).total_seconds() > 10*60:
-                old_dt, old_user = q10_users.popleft()
-                users_window[old_user] -= 1
-                if users_window[old_user] <= 0:
-                    del users_window[old_user]
-            q10_users.append((dt, user))
-            users_window[user] = users_window.get(user, 0) + 1
-
-            # check rules
-            if len(q24) >= 30:
-                perm = True
-            if len(q5) >= 10:
-                temp = True
-            if len(users_window.keys()) >= 5:
-                temp = True
-        if perm:
-            to_block[ip] = {"type": "perm"}
-        elif temp:
-            until = (events[-1][0] + timedelta(hours=1)).astimezone(timezone.utc).isoformat()
-            to_block[ip] = {"type": "temp", "until": until}
+    rules = rules if rules is not None else load_rules(RULES_FILE)
+    if isinstance(recs, EventTable) and workers > 1:
+        to_block = _detect_parallel(recs, rules, workers)
+    elif isinstance(recs, EventTable) and numpy_enabled():
+        to_block = _detect_vectorized(recs, rules)
+    else:
+        to_block = _detect_engine(recs, rules)
 
+    apply_blocks(to_block)
+    return to_block
+
+def apply_blocks(to_block: Dict[str, dict]) -> Dict[str, dict]:
+    # Junta os bloqueios à blacklist; devolve os que entraram ou mudaram de tipo
     black = get_blacklist()
-    changed = False
+    # Bloqueios expirados saem antes da junção (um IP detetado de novo volta a ser
+    # bloqueado) e depois dela; tudo numa só escrita
+    changed = bool(purge_expired_blocks(black))
+    applied = {}
     for ip, rec in to_block.items():
         old = black.get(ip)
         if old:
             # Upgrade temp->perm if necessary
             if old.get("type") != rec.get("type"):
                 black[ip] = rec
-                changed = True
+                applied[ip] = rec
         else:
             black[ip] = rec
-            changed = True
+            applied[ip] = rec
+    changed = bool(purge_expired_blocks(black)) or changed or bool(applied)
     if changed:
         put_blacklist(black)
-    return to_block
+    return {ip: rec for ip, rec in applied.items() if ip in black}  # sem os que já tinham expirado
+
+# --------------------- Análise incremental (watch / --auto-analyze) ---------------------
+# O estado guarda o offset (em bytes) já lido no log e as janelas por IP do motor
+# de regras; cada poll() lê só as linhas acrescentadas desde então (O(1) por
+# evento, em vez de reler o log inteiro) e aplica logo os bloqueios disparados.
+
+class IncrementalAnalyzer:
+    """Segue o log: janelas por IP persistentes + offset do que já foi lido.
+
+    Se o log foi truncado, rodado ou reescrito, ou as regras mudaram, recomeça
+    do início. Cada lote lido é ordenado por tempo, e uma falha até
+    MAX_LATENESS segundos mais antiga do que a última já vista para o mesmo IP
+    (processos a escrever lotes fora de ordem) conta no instante dessa última.
+    Só um atraso maior obriga a refazer a análise com as falhas ordenadas,
+    como em detect_and_block.
+    """
+
+    def __init__(self, rules=None, log_file: Path = LOG_FILE, state_file: Path = STATE_FILE):
+        self.rules = rules if rules is not None else load_rules(RULES_FILE)
+        self.log_file = log_file
+        self.state_file = state_file
+        self.events = 0  # linhas lidas no último poll()
+        self.reset()
+
+    def reset(self) -> None:
+        self.engine = RuleEngine(self.rules, fields=("user",), max_lateness=MAX_LATENESS)
+        self.offset = 0  # fim da última linha completa já lida
+        self.head = ""   # impressão digital do início do log (até ao offset)
+        self._ino = None
+
+    def load(self) -> bool:
+        """Retoma o estado gravado; False (e estado vazio) se não houver um utilizável."""
+        self.reset()
+        try:
+            st = json.loads(self.state_file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return False
+        if st.get("version") != STATE_VERSION or not self.engine.load_state(st.get("engine")):
+            self.reset()
+            return False
+        self.offset, self.head = st["offset"], st["head"]
+        if not self._cursor_valid():
+            self.reset()
+            return False
+        return True
+
+    def save(self) -> None:
+        self.engine.prune(drop_fired=True)  # IPs sem eventos nas últimas 24h (maior janela) saem do estado
+        st = {"version": STATE_VERSION, "offset": self.offset, "head": self.head,
+              "engine": self.engine.export_state()}
+        # JSON compacto, tmp + replace: o estado é lido e gravado a cada --auto-analyze
+        tmp = f"{self.state_file}.{os.getpid()}.tmp"
+        with file_lock(self.state_file):
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(json.dumps(st, separators=(",", ":")))
+            os.replace(tmp, self.state_file)
+
+    def poll(self, rows: Optional[list] = None) -> Dict[str, dict]:
+        """Processa as linhas completas novas; devolve os bloqueios aplicados (novos ou agravados).
+
+        rows: se dada, recebe os registos lidos (epoch, username, ip, RESULT).
+        """
+        self.events = 0
+        try:
+            st = self.log_file.stat()
+        except FileNotFoundError:
+            return {}
+        if st.st_ino == self._ino and st.st_size == self.offset:
+            return {}
+        if st.st_ino != self._ino or st.st_size < self.offset:
+            if not self._cursor_valid():
+                self.reset()
+        self._ino = st.st_ino
+
+        last_fail: Dict[str, float] = {}
+        in_order = True
+        for batch in self._read_new():
+            self.events += len(batch)
+            if rows is not None:
+                rows.extend(batch)
+            if not in_order:
+                continue
+            try:
+                for ts, user, ip, res in sorted(batch, key=lambda r: r[0]):
+                    if res == "FAIL":
+                        self.engine.feed(ip, ts, (user,))
+                        last_fail[ip] = max(ts, last_fail.get(ip, ts))
+            except OutOfOrderError:
+                in_order = False
+        if not in_order:
+            last_fail = self._rebuild()
+
+        to_block = {}
+        for ip, ts in last_fail.items():
+            fired = self.engine.fired(ip)
+            if fired:
+                to_block[ip] = block_record(fired, ts)
+        return apply_blocks(to_block) if to_block else {}
+
+    def _cursor_valid(self) -> bool:
+        # False se o log foi truncado ou reescrito desde que o offset foi lido
+        if self.offset == 0:
+            return True
+        try:
+            with self.log_file.open("rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                return self.offset <= size and _head_fingerprint(f, self.offset) == self.head
+        except FileNotFoundError:
+            return False
+
+    def _read_new(self) -> Iterator[List[Tuple[float, str, str, str]]]:
+        # Lotes de registos a partir do offset; uma linha a meio (ainda a ser escrita) fica para depois
+        with self.log_file.open("rb") as f:
+            if self.offset == 0:
+                header = f.readline()
+                if not header.endswith(b"\n"):
+                    return
+                self.offset = f.tell()
+            f.seek(self.offset)
+            partial = False
+            while not partial:
+                lines = []
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        partial = True
+                        break
+                    self.offset += len(raw)
+                    lines.append(raw.decode("utf-8", errors="replace"))
+                    if len(lines) >= READ_BATCH:
+                        break
+                if not lines:
+                    break
+                yield list(parse_log_lines(lines))
+            self.head = _head_fingerprint(f, self.offset)
+
+    def _rebuild(self) -> Dict[str, float]:
+        # Motor novo sobre todo o log já lido, com as falhas ordenadas por tempo
+        self.engine = RuleEngine(self.rules, fields=("user",), max_lateness=MAX_LATENESS)
+        with self.log_file.open("rb") as f:
+            f.readline()
+            text = f.read(self.offset - f.tell()).decode("utf-8", errors="replace")
+        fails = [(ts, user, ip) for ts, user, ip, res in parse_log_lines(text.splitlines()) if res == "FAIL"]
+        fails.sort(key=lambda x: x[0])
+        last_fail = {}
+        for ts, user, ip in fails:
+            self.engine.feed(ip, ts, (user,))
+            last_fail[ip] = ts
+        return last_fail
+
+def analyze_new_lines() -> Tuple[List[Tuple[float, str, str, str]], Dict[str, dict]]:
+    # Retoma o estado gravado, processa as linhas novas e grava; sob o lock do estado,
+    # dois processos ao mesmo tempo não processam as mesmas linhas
+    watcher = IncrementalAnalyzer()
+    with file_lock(watcher.state_file):
+        watcher.load()
+        recs: List[Tuple[float, str, str, str]] = []
+        blocked = watcher.poll(recs)
+        watcher.save()
+    return recs, blocked
+
+def _head_fingerprint(f, upto: int) -> str:
+    f.seek(0)
+    return hashlib.sha1(f.read(min(upto, HEAD_FINGERPRINT_BYTES))).hexdigest()
 
 def console_summary(stats: Dict[str, any]) -> str:
     lines = []
@@ -1,30 +1,38 @@
 
 from __future__ import annotations
-import os, hashlib, hmac, secrets
+import asyncio, os, sys, hashlib, hmac, secrets
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from pathlib import Path
 from typing import Optional, Tuple
-from storage import get_users, put_users, now
+from storage import get_user, add_user, get_lockout, update_lockout, now
 from logger import log_event
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # pacote shared/
+from shared.kdfpool import default_pool
+
 PBKDF2_ITERATIONS = 200_000
 
+# I/O de authenticate_async (SQLite, lockout.bin, log) fora do event loop
+_io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="auth-io")
+
 def _hash_password(password: str, salt: bytes) -> str:
     dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, PBKDF2_ITERATIONS)
     return dk.hex()
 
 def create_user(username: str, password: str) -> None:
-    users = get_users()
-    if username in users:
+    if get_user(username):
         raise ValueError("Utilizador já existe.")
     salt = secrets.token_bytes(16)
-    users[username] = {
+    rec = {
         "salt": salt.hex(),
         "hash": _hash_password(password, salt),
         "failed_attempts": 0,
         "lockout_until": None,
         "last_failed": None,
     }
-    put_users(users)
+    if not add_user(username, rec):
+        raise ValueError("Utilizador já existe.")
 
 def _check_lockout(user_rec) -> Optional[str]:
     lu = user_rec.get("lockout_until")
@@ -41,40 +49,77 @@ def _check_lockout(user_rec) -> Optional[str]:
         return None
     return None
 
-def authenticate(username: str, password: str, ip: str) -> Tuple[bool, str]:
-    users = get_users()
-    user_rec = users.get(username)
+def _begin(username: str, ip: str):
+    # (user_rec, None) se há que verificar a password; senão (None, resposta)
+    # Credenciais só são lidas; as falhas vão para o estado de lockout (storage.get_lockout)
+    user_rec = get_user(username)
     if not user_rec:
         # Não revelar se o user existe; regista falha genérica
         log_event(username, ip, "FAIL")
-        return False, "Credenciais inválidas."
+        return None, (False, "Credenciais inválidas.")
     # Lockout?
-    lo = _check_lockout(user_rec)
+    lo = _check_lockout(get_lockout(username))
     if lo:
         log_event(username, ip, "LOCKED")
-        return False, f"Conta temporariamente bloqueada até {lo}."
-    # Verify
+        return None, (False, f"Conta temporariamente bloqueada até {lo}.")
+    return user_rec, None
+
+def _verify(user_rec, password: str) -> bool:
     salt = bytes.fromhex(user_rec["salt"])
     expected = user_rec["hash"]
     given = _hash_password(password, salt)
-    ok = hmac.compare_digest(given, expected)
+    return hmac.compare_digest(given, expected)
+
+def _add_failure(lock):
+    # update attempts + exponential backoff
+    lock["failed_attempts"] = int(lock.get("failed_attempts", 0)) + 1
+    lock["last_failed"] = now().isoformat()
+    attempts = lock["failed_attempts"]
+    if attempts >= 3:
+        # backoff exponencial: 2^(attempts-3) minutos (1,2,4,8,...)
+        minutes = 2 ** (attempts - 3)
+        from datetime import timedelta
+        lock["lockout_until"] = (now() + timedelta(minutes=minutes)).isoformat()
+    return lock
+
+def _finish(username: str, ip: str, ok: bool) -> Tuple[bool, str]:
+    # O estado de lockout é relido e gravado sob lock (storage.update_lockout): falhas
+    # em simultâneo, neste ou noutros processos, contam todas
     if ok:
-        user_rec["failed_attempts"] = 0
-        user_rec["last_failed"] = None
-        user_rec["lockout_until"] = None
-        put_users(users)
+        # A conta pode ter sido bloqueada por outras tentativas enquanto o PBKDF2 corria
+        # (authenticate_async, outros processos): volta-se a ver sob o mesmo lock
+        def reset(lock):
+            if _check_lockout(lock):
+                return None
+            if lock["failed_attempts"] or lock["lockout_until"] or lock["last_failed"]:
+                return {"failed_attempts": 0, "last_failed": None, "lockout_until": None}
+            return None
+        lock = update_lockout(username, reset)
+        lo = _check_lockout(lock)
+        if lo:
+            log_event(username, ip, "LOCKED")
+            return False, f"Conta temporariamente bloqueada até {lo}."
         log_event(username, ip, "SUCCESS")
         return True, "Autenticação bem-sucedida."
     else:
-        # update attempts + exponential backoff
-        user_rec["failed_attempts"] = int(user_rec.get("failed_attempts", 0)) + 1
-        user_rec["last_failed"] = now().isoformat()
-        attempts = user_rec["failed_attempts"]
-        if attempts >= 3:
-            # backoff exponencial: 2^(attempts-3) minutos (1,2,4,8,...)
-            minutes = 2 ** (attempts - 3)
-            from datetime import timedelta
-            user_rec["lockout_until"] = (now() + timedelta(minutes=minutes)).isoformat()
-        put_users(users)
+        update_lockout(username, _add_failure)
         log_event(username, ip, "FAIL")
         return False, "Credenciais inválidas."
+
+def authenticate(username: str, password: str, ip: str) -> Tuple[bool, str]:
+    user_rec, early = _begin(username, ip)
+    if early:
+        return early
+    return _finish(username, ip, _verify(user_rec, password))
+
+async def authenticate_async(username: str, password: str, ip: str) -> Tuple[bool, str]:
+    # Igual a authenticate, mas o PBKDF2 corre no pool de threads (shared/kdfpool.py):
+    # muitos logins em simultâneo usam todos os núcleos sem bloquear o event loop.
+    # _begin/_finish fazem I/O e correm no thread _io; o lockout de _begin é só uma
+    # pré-verificação, _finish relê e grava o estado sob lock depois do PBKDF2
+    loop = asyncio.get_running_loop()
+    user_rec, early = await loop.run_in_executor(_io, _begin, username, ip)
+    if early:
+        return early
+    ok = await default_pool().run(_verify, user_rec, password)
+    return await loop.run_in_executor(_io, _finish, username, ip, ok)
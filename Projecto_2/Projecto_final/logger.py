@@ -1,10 +1,21 @@
-
 from __future__ import annotations
+import sys
 from datetime import datetime, timezone
-from storage import log_line
+from pathlib import Path
+from storage import LOG_FILE
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # pacote shared/
+from shared.buflog import BufferedLog
+
+# Tentativas em fila, gravadas em lote por um thread de fundo (shared/buflog.py)
+_log = BufferedLog(LOG_FILE, header="timestamp,username,ip,result\n")
 
 def log_event(username: str, ip: str, result: str) -> None:
     ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S%z")
     # CSV: timestamp,username,ip,result
     line = f"{ts},{username},{ip},{result}"
-    log_line(line)
+    _log.write(line + "\n")
+
+def flush() -> None:
+    # Grava (com fsync) as tentativas ainda em fila; antes de ler o log neste processo
+    _log.flush()
@@ -1,9 +1,11 @@
 from __future__ import annotations
-import argparse, getpass, sys
-from storage import is_ip_blocked, ensure_log_headers
+import argparse, getpass, signal, sys, time
+from datetime import datetime
+from storage import is_ip_blocked, ensure_log_headers, purge_blacklist, migrate_users, USERS_FILE, LOG_FILE
 from auth import create_user, authenticate
 from ui import prompt_credentials, prompt_ip
-from analyzer import read_logs, analyze, detect_and_block, console_summary
+from analyzer import read_events, analyze, detect_and_block, console_summary, IncrementalAnalyzer, analyze_new_lines
+import logger
 
 
 def cmd_create_user(args):
@@ -29,23 +31,83 @@ def cmd_login(args):
     print(msg)
 
     if args.auto_analyze:
-        run_analyzer()
+        run_auto_analyzer()
 
 
-def run_analyzer():
-    recs = read_logs()
+def run_analyzer(workers: int = 1):
+    logger.flush()  # tentativas deste processo ainda em fila
+    recs = read_events(workers)
     stats = analyze(recs)
     print("--- Estatísticas ---")
     print(console_summary(stats))
-    blocked = detect_and_block(recs)
+    blocked = detect_and_block(recs, workers=workers)
     if blocked:
         print("--- Bloqueios aplicados ---")
         for ip, rec in blocked.items():
             print(ip, rec)
 
 
-def cmd_analyze(_args):
-    run_analyzer()
+def run_auto_analyzer():
+    # Só as linhas escritas desde a última análise (offset + janelas por IP em analyzer_state.json),
+    # em vez de reler o log inteiro a cada login
+    logger.flush()  # tentativas deste processo ainda em fila
+    recs, blocked = analyze_new_lines()
+    print("--- Estatísticas (linhas novas) ---")
+    print(console_summary(analyze(recs)))
+    if blocked:
+        print("--- Bloqueios aplicados ---")
+        for ip, rec in blocked.items():
+            print(ip, rec)
+
+
+def cmd_analyze(args):
+    if args.workers < 1:
+        print("Erro: --workers tem de ser >= 1")
+        sys.exit(2)
+    run_analyzer(args.workers)
+
+
+def cmd_watch(args):
+    # Segue o log e bloqueia assim que um IP passa um limiar (janelas por IP em memória)
+    if args.interval <= 0:
+        print("Erro: --interval tem de ser > 0")
+        sys.exit(2)
+    watcher = IncrementalAnalyzer()
+    if args.from_start or not watcher.load():
+        watcher.reset()
+        print(f"A analisar {LOG_FILE.name} desde o início...")
+    print(f"A seguir {LOG_FILE.name} a cada {args.interval}s (Ctrl+C para terminar).")
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # kill/systemd: grava o estado à saída
+    last_save, dirty = time.monotonic(), False
+    try:
+        while True:
+            blocked = watcher.poll()
+            for ip, rec in blocked.items():
+                print(datetime.now().isoformat(timespec="seconds"), "bloqueado", ip, rec, flush=True)
+            dirty = dirty or bool(watcher.events)
+            if dirty and time.monotonic() - last_save >= args.save_every:
+                watcher.save()
+                last_save, dirty = time.monotonic(), False
+            if not watcher.events:
+                time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.save()  # a próxima execução retoma daqui
+
+
+def cmd_purge_blacklist(_args):
+    n = purge_blacklist()
+    print(f"{n} bloqueio(s) expirado(s) removido(s) da blacklist.")
+
+
+def cmd_migrate_users(_args):
+    if not USERS_FILE.exists():
+        print(f"Erro: {USERS_FILE.name} não encontrado.")
+        sys.exit(1)
+    n = migrate_users()
+    print(f"{n} utilizador(es) copiado(s) de {USERS_FILE.name} para users.db; "
+          f"o {USERS_FILE.name} deixa de ser usado e pode ser arquivado.")
 
 
 def cmd_gui(_args=None):
@@ -75,11 +137,28 @@ def main():
     p2.set_defaults(func=cmd_login)
 
     p3 = sub.add_parser("analyze", help="Executar o analisador de logs e aplicar bloqueios")
+    p3.add_argument("--workers", type=int, default=1, metavar="N",
+                    help="Lê o log e avalia as regras em N processos (IPs repartidos por hash)")
     p3.set_defaults(func=cmd_analyze)
 
     p4 = sub.add_parser("gui", help="Abrir interface gráfica Tkinter")
     p4.set_defaults(func=cmd_gui)
 
+    p5 = sub.add_parser("purge-blacklist", help="Remover da blacklist os bloqueios temporários expirados")
+    p5.set_defaults(func=cmd_purge_blacklist)
+
+    p6 = sub.add_parser("migrate-users", help="Migrar users.json para a base SQLite users.db")
+    p6.set_defaults(func=cmd_migrate_users)
+
+    p7 = sub.add_parser("watch", help="Seguir o log e aplicar bloqueios em tempo real")
+    p7.add_argument("--interval", type=float, default=0.2, metavar="SEG",
+                    help="Intervalo entre verificações do log quando não há linhas novas")
+    p7.add_argument("--save-every", type=float, default=5.0, metavar="SEG",
+                    help="Grava o estado (offset + janelas) no máximo a cada SEG segundos")
+    p7.add_argument("--from-start", action="store_true",
+                    help="Ignora o estado gravado e analisa o log desde o início")
+    p7.set_defaults(func=cmd_watch)
+
     # --- Se não houver argumentos, abrir GUI por defeito ---
     if len(sys.argv) == 1:
         cmd_gui(None)
@@ -1,12 +1,24 @@
 
 from __future__ import annotations
+import os
+import sys
 from pathlib import Path
 from datetime import datetime, timezone
 import json
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # pacote shared/
+from shared.iptrie import cached_blacklist_index
+from shared.journal import read_blacklist, save_blacklist
+from shared.locking import file_lock, json_transaction
+from shared.lockout import LockoutFile
+import userdb
+from shared.expiry import purge_expired
 
 BASE_DIR = Path(__file__).parent
 USERS_FILE = BASE_DIR / "users.json"
+USERS_DB = BASE_DIR / "users.db"
+LOCKOUT_FILE = BASE_DIR / "lockout.bin"  # failed_attempts/lockout_until/last_failed (shared/lockout.py)
 BLACKLIST_FILE = BASE_DIR / "blacklist.json"
 LOG_FILE = BASE_DIR / "logs_exemplo.csv"
 
@@ -20,35 +32,152 @@ def read_json(path: Path, default):
         return json.load(f)
 
 def write_json(path: Path, data):
-    tmp = path.with_suffix(path.suffix + ".tmp")
+    # tmp por processo: dois escritores nunca partilham o mesmo ficheiro temporário
+    tmp = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
     with tmp.open("w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
     tmp.replace(path)
 
+def use_userdb() -> bool:
+    # SQLite (userdb.py) se já existir users.db ou se ainda não houver users.json;
+    # um users.json antigo continua a ser usado até correr `main.py migrate-users`
+    return USERS_DB.exists() or not USERS_FILE.exists()
+
 def get_users() -> Dict[str, Any]:
+    if use_userdb():
+        return userdb.get_users(USERS_DB)
     return read_json(USERS_FILE, {})
 
 def put_users(users: Dict[str, Any]) -> None:
-    write_json(USERS_FILE, users)
+    if use_userdb():
+        userdb.put_users(USERS_DB, users)
+    else:
+        with file_lock(USERS_FILE):
+            write_json(USERS_FILE, users)
+
+def get_user(username: str) -> Optional[Dict[str, Any]]:
+    # Em SQLite: uma consulta pela chave primária, sem ler os restantes utilizadores
+    if use_userdb():
+        return userdb.get_user(USERS_DB, username)
+    return get_users().get(username)
+
+def add_user(username: str, rec: Dict[str, Any]) -> bool:
+    # False se o utilizador já existir
+    if use_userdb():
+        return userdb.insert_user(USERS_DB, username, rec)
+    with json_transaction(USERS_FILE, write=write_json) as users:
+        if username in users:
+            return False
+        users[username] = rec
+    return True
+
+def update_user(username: str, fields: Dict[str, Any]) -> bool:
+    # Atualiza só os campos dados de um utilizador; False se não existir
+    if use_userdb():
+        return userdb.update_user(USERS_DB, username, fields)
+    with json_transaction(USERS_FILE, write=write_json) as users:
+        if username not in users:
+            return False
+        users[username].update(fields)
+    return True
+
+_lockout = LockoutFile(LOCKOUT_FILE)
+
+def _epoch(iso: Optional[str]) -> float:
+    return datetime.fromisoformat(iso).timestamp() if iso else 0.0
+
+def _iso(ts: float) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+def _lockout_file() -> LockoutFile:
+    # Na 1.ª utilização, os contadores antigos guardados nos utilizadores passam para o lockout.bin
+    if not LOCKOUT_FILE.exists():
+        for username, rec in get_users().items():
+            if rec.get("failed_attempts") or rec.get("lockout_until") or rec.get("last_failed"):
+                put_lockout(username, rec, _lockout)
+        _lockout.ensure()
+    return _lockout
+
+def _lock_dict(st) -> Dict[str, Any]:
+    if st is None:
+        return {"failed_attempts": 0, "lockout_until": None, "last_failed": None}
+    return {"failed_attempts": st[0], "lockout_until": _iso(st[1]), "last_failed": _iso(st[2])}
+
+def _lock_tuple(state: Dict[str, Any]):
+    return (int(state.get("failed_attempts") or 0),
+            _epoch(state.get("lockout_until")), _epoch(state.get("last_failed")))
+
+def get_lockout(username: str) -> Dict[str, Any]:
+    # Estado de lockout (um pread); as credenciais não são lidas nem escritas
+    return _lock_dict(_lockout_file().get(username))
+
+def put_lockout(username: str, state: Dict[str, Any], lockout: Optional[LockoutFile] = None) -> None:
+    (lockout or _lockout_file()).put(username, *_lock_tuple(state))
+
+def update_lockout(username: str, fn: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    # Ler-alterar-gravar sob o lock do lockout.bin: falhas em simultâneo (threads ou
+    # processos) somam todas. fn devolve o estado novo, ou None para não gravar
+    def apply(st):
+        new = fn(_lock_dict(st))
+        return None if new is None else _lock_tuple(new)
+    return _lock_dict(_lockout_file().update(username, apply))
+
+def migrate_users() -> int:
+    # users.json -> users.db; a partir daí use_userdb() passa a escolher a base SQLite
+    return userdb.migrate_from_json(USERS_FILE, USERS_DB)
 
 def get_blacklist() -> Dict[str, Any]:
-    return read_json(BLACKLIST_FILE, {})
+    # Snapshot blacklist.json + journal blacklist.journal.jsonl (shared/journal.py)
+    return read_blacklist(BLACKLIST_FILE)
 
 def put_blacklist(black: Dict[str, Any]) -> None:
-    write_json(BLACKLIST_FILE, black)
+    # Só as entradas alteradas desde get_blacklist() vão para o journal (uma linha
+    # cada); o snapshot é reescrito apenas na compactação periódica
+    save_blacklist(black, BLACKLIST_FILE, lambda data: write_json(BLACKLIST_FILE, data))
+
+def block_until(rec: Dict[str, Any]) -> Optional[float]:
+    # Fim (epoch) de um bloqueio temporário; None se não expira ou se a data é inválida
+    if not rec or rec.get("type") != "temp" or not rec.get("until"):
+        return None
+    try:
+        return datetime.fromisoformat(rec["until"]).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def purge_expired_blocks(black: Dict[str, Any], now_dt: Optional[datetime] = None) -> list:
+    """Retira de `black` (em memória) os bloqueios temporários expirados; quem chama grava uma vez."""
+    return purge_expired(black, block_until, (now_dt or now()).timestamp())
+
+def purge_blacklist() -> int:
+    # Limpeza em lote (p.ex. via cron): uma única escrita para todas as expiradas
+    black = get_blacklist()
+    removed = purge_expired_blocks(black)
+    if removed:
+        put_blacklist(black)
+    return len(removed)
 
 def ensure_log_headers() -> None:
     if not LOG_FILE.exists():
         LOG_FILE.write_text("timestamp,username,ip,result\n", encoding="utf-8")
 
 def log_line(line: str) -> None:
-    ensure_log_headers()
-    with LOG_FILE.open("a", encoding="utf-8") as f:
-        f.write(line + "\n")
+    # Com o mesmo lock do logger em lote (shared/buflog.py) e dos outros processos
+    with file_lock(LOG_FILE):
+        ensure_log_headers()
+        with LOG_FILE.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
 
 def is_ip_blocked(ip: str, now_dt: Optional[datetime] = None) -> Optional[str]:
-    black = get_blacklist()
-    rec = black.get(ip)
+    # Consulta sobre a blacklist em cache (relida só quando o snapshot ou o journal mudam),
+    # indexada por IP e por rede CIDR; as entradas mais específicas primeiro
+    index = cached_blacklist_index(BLACKLIST_FILE)
+    for rec in index.matches(ip):
+        status = _block_status(rec[1], now_dt)
+        if status:
+            return status
+    return None
+
+def _block_status(rec: Dict[str, Any], now_dt: Optional[datetime]) -> Optional[str]:
     if not rec:
         return None
     if rec.get("type") == "perm":
@@ -65,9 +194,7 @@ def is_ip_blocked(ip: str, now_dt: Optional[datetime] = None) -> Optional[str]:
             now_dt = now()
         if now_dt < until_dt:
             return f"temporary until {until_dt.isoformat()}"
-        else:
-            # expired -> remove
-            del black[ip]
-            put_blacklist(black)
-            return None
+        # Expirado: ignorado aqui; sai da blacklist na próxima limpeza em lote
+        # (analisador ou purge-blacklist), nunca com uma reescrita durante o login
+        return None
     return None
@@ -1,11 +1,16 @@
 
 from __future__ import annotations
+import sys
 import tkinter as tk
+from pathlib import Path
 from tkinter import messagebox, simpledialog
 from typing import Optional, Callable
 from auth import authenticate, create_user
 from storage import is_ip_blocked
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # pacote shared/
+from shared.tkjobs import BackgroundJob
+
 class LoginApp(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -31,30 +36,75 @@ class LoginApp(tk.Tk):
         # Buttons
         btn_frame = tk.Frame(self)
         btn_frame.pack(pady=15)
-        tk.Button(btn_frame, text="Login", width=12, command=self.on_login).grid(row=0, column=0, padx=5)
-        
+        self.login_btn = tk.Button(btn_frame, text="Login", width=12, command=self.on_login)
+        self.login_btn.grid(row=0, column=0, padx=5)
+        self.cancel_btn = tk.Button(btn_frame, text="Cancelar", width=12, command=self.on_cancel, state=tk.DISABLED)
+        self.cancel_btn.grid(row=0, column=1, padx=5)
 
         # Status
         self.status = tk.StringVar(value="Pronto.")
         tk.Label(self, textvariable=self.status, fg="gray").pack(pady=(5,0))
 
+        self.job: Optional[BackgroundJob] = None
+
     def on_login(self):
+        if self.job and not self.job.finished:
+            return  # também enquanto um login cancelado ainda corre
         username = self.username_var.get().strip()
         password = self.password_var.get()
         ip = self.ip_var.get().strip() or "127.0.0.1"
 
-        blocked = is_ip_blocked(ip)
-        if blocked:
-            messagebox.showwarning("IP bloqueado", f"Acesso bloqueado para o IP {ip} ({blocked}).")
-            return
+        # PBKDF2 + I/O num thread à parte: a janela continua a responder (ver shared/tkjobs.py)
+        self.job = BackgroundJob(self, _login_worker, username, password, ip,
+                                 on_done=self._login_done, on_error=self._login_error,
+                                 on_progress=self._login_progress, on_cancelled=self._login_cancelled)
+        self._set_busy(True)
+        self.status.set("A autenticar...")
+        self.job.start()
+
+    def on_cancel(self):
+        if self.job and self.job.running:
+            # O authenticate em curso não pára: o Login só volta quando ele acabar
+            self.job.cancel()
+            self.cancel_btn.config(state=tk.DISABLED)
+            self.status.set("A cancelar... (esta tentativa ainda pode contar para o bloqueio da conta)")
+
+    def _set_busy(self, busy: bool):
+        self.login_btn.config(state=tk.DISABLED if busy else tk.NORMAL)
+        self.cancel_btn.config(state=tk.NORMAL if busy else tk.DISABLED)
+
+    def _login_progress(self, secs: float):
+        self.status.set(f"A autenticar... {secs:.1f}s")
 
-        ok, msg = authenticate(username, password, ip)
+    def _login_done(self, result):
+        self._set_busy(False)
+        kind, ok, msg = result
         self.status.set(msg)
-        if ok:
+        if kind == "blocked":
+            messagebox.showwarning("IP bloqueado", msg)
+        elif ok:
             messagebox.showinfo("Sucesso", msg)
         else:
             messagebox.showerror("Falha", msg)
 
+    def _login_cancelled(self):
+        self._set_busy(False)
+        self.status.set("Login cancelado. A tentativa pode ter contado para o bloqueio da conta.")
+
+    def _login_error(self, exc: BaseException):
+        self._set_busy(False)
+        self.status.set("Erro na autenticação.")
+        messagebox.showerror("Erro", str(exc))
+
+
+def _login_worker(username: str, password: str, ip: str):
+    # Corre fora do thread do Tk: ("blocked"|"auth", ok, mensagem)
+    blocked = is_ip_blocked(ip)
+    if blocked:
+        return "blocked", False, f"Acesso bloqueado para o IP {ip} ({blocked})."
+    ok, msg = authenticate(username, password, ip)
+    return "auth", ok, msg
+
 
 def run_gui():
     app = LoginApp()
@@ -0,0 +1,102 @@
+
+from __future__ import annotations
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Base de utilizadores em SQLite (stdlib): uma linha por utilizador, com chave
+# primária no username (B-tree), pelo que ler ou atualizar um utilizador custa
+# O(log n) em vez de ler/reescrever o users.json inteiro. Modo WAL: leitores
+# não bloqueiam o escritor (GUI, CLI e analisador em simultâneo).
+
+FIELDS = ("salt", "hash", "failed_attempts", "lockout_until", "last_failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username        TEXT PRIMARY KEY,
+    salt            TEXT NOT NULL,
+    hash            TEXT NOT NULL,
+    failed_attempts INTEGER NOT NULL DEFAULT 0,
+    lockout_until   TEXT,
+    last_failed     TEXT
+) WITHOUT ROWID
+"""
+
+_COLS = ", ".join(FIELDS)
+_local = threading.local()  # uma ligação por thread e por ficheiro
+
+def connect(path: Path) -> sqlite3.Connection:
+    conns = _local.__dict__.setdefault("conns", {})
+    key = str(path)
+    conn = conns.get(key)
+    if conn is None:
+        conn = sqlite3.connect(key, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # em WAL continua consistente após falha
+        conn.execute(SCHEMA)
+        conn.commit()
+        conns[key] = conn
+    return conn
+
+def _record(row: Tuple) -> Dict[str, Any]:
+    return dict(zip(FIELDS, row))
+
+def _row(username: str, rec: Dict[str, Any]) -> Tuple:
+    return (username, rec["salt"], rec["hash"], int(rec.get("failed_attempts") or 0),
+            rec.get("lockout_until"), rec.get("last_failed"))
+
+def get_user(path: Path, username: str) -> Optional[Dict[str, Any]]:
+    row = connect(path).execute(f"SELECT {_COLS} FROM users WHERE username = ?", (username,)).fetchone()
+    return _record(row) if row else None
+
+def get_users(path: Path) -> Dict[str, Dict[str, Any]]:
+    rows = connect(path).execute(f"SELECT username, {_COLS} FROM users ORDER BY username")
+    return {r[0]: _record(r[1:]) for r in rows}
+
+def insert_user(path: Path, username: str, rec: Dict[str, Any]) -> bool:
+    # False se já existir (sem corridas entre processos: a chave primária decide)
+    conn = connect(path)
+    try:
+        with conn:
+            conn.execute(f"INSERT INTO users (username, {_COLS}) VALUES (?, ?, ?, ?, ?, ?)", _row(username, rec))
+    except sqlite3.IntegrityError:
+        return False
+    return True
+
+def update_user(path: Path, username: str, fields: Dict[str, Any]) -> bool:
+    # Atualiza só os campos dados; False se o utilizador não existir
+    cols = [f for f in fields if f in FIELDS]
+    if not cols:
+        return get_user(path, username) is not None
+    conn = connect(path)
+    with conn:
+        cur = conn.execute(f"UPDATE users SET {', '.join(c + ' = ?' for c in cols)} WHERE username = ?",
+                           [fields[c] for c in cols] + [username])
+    return cur.rowcount > 0
+
+def put_users(path: Path, users: Dict[str, Dict[str, Any]]) -> None:
+    # Substitui a tabela inteira numa só transação (contrato de storage.put_users)
+    conn = connect(path)
+    with conn:
+        conn.execute("DELETE FROM users")
+        _insert_many(conn, users.items())
+
+def _insert_many(conn: sqlite3.Connection, items: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+    cur = conn.executemany(f"INSERT OR REPLACE INTO users (username, {_COLS}) VALUES (?, ?, ?, ?, ?, ?)",
+                           (_row(u, rec) for u, rec in items))
+    return cur.rowcount
+
+def migrate_from_json(json_path: Path, db_path: Path) -> int:
+    """Copia os utilizadores de users.json para a base SQLite; devolve quantos.
+
+    Utilizadores que já existam na base são substituídos pelos do JSON, pelo
+    que correr a migração duas vezes dá o mesmo resultado.
+    """
+    with Path(json_path).open("r", encoding="utf-8") as f:
+        users = json.load(f)
+    conn = connect(db_path)
+    with conn:
+        _insert_many(conn, users.items())
+    return len(users)
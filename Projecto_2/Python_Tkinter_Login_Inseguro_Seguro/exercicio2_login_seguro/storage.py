@@ -1,24 +1,143 @@
-
-import json, time
+import json, os, sys, time
 from pathlib import Path
 
+# pacote shared/: o 1.º diretório acima que o contenha (o módulo também corre copiado para outro sítio)
+_root = next((d for d in Path(__file__).resolve().parents if (d / "shared").is_dir()), None)
+if _root is not None:
+    sys.path.insert(0, str(_root))
+from shared.locking import file_lock
+
 DB_FILE = Path(__file__).parent / "users_secure.json"
+LOG_FILE = DB_FILE.with_suffix(".log")
+
+# O log é dobrado no snapshot quando tem mais registos do que há utilizadores
+COMPACT_MIN = 1000
+
+def _sig(path: Path):
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+class UserStore:
+    """Utilizadores num snapshot JSON (users_secure.json) + log append-only (users_secure.log).
+
+    Os utilizadores ficam num índice em memória (dict). put_user acrescenta
+    uma linha {"u": username, "rec": {...}} ao log, em vez de reescrever o
+    ficheiro inteiro; get_user só lê do índice. Se outro processo acrescentar
+    ao log, lê-se apenas o que foi acrescentado; se o snapshot mudar (p.ex.
+    compactação noutro processo), volta-se a ler tudo. put e compact correm
+    com o lock de db_file, para uma compactação não apagar linhas acrescentadas
+    por outro processo entre a leitura e o unlink do log.
+    """
+
+    def __init__(self, db_file: Path, log_file: Path):
+        self.db_file = db_file
+        self.log_file = log_file
+        self.users = None
+        self.records = 0         # registos no log
+        self._db_sig = None
+        self._log_ino = None
+        self._log_pos = 0        # bytes do log já aplicados ao índice
+
+    def _reload(self) -> None:
+        if self.db_file.exists():
+            self.users = json.loads(self.db_file.read_text(encoding="utf-8"))["users"]
+        else:
+            self.users = {}
+        self._db_sig = _sig(self.db_file)
+        self.records = 0
+        self._log_ino = None
+        self._log_pos = 0
+        self._read_log()
+
+    def _read_log(self) -> None:
+        # Aplica as linhas completas acrescentadas ao log desde _log_pos
+        try:
+            with self.log_file.open("rb") as f:
+                self._log_ino = os.fstat(f.fileno()).st_ino
+                f.seek(self._log_pos)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b"\n") + 1  # uma linha a meio de ser escrita fica para depois
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            self.users[entry["u"]] = entry["rec"]
+            self.records += 1
+        self._log_pos += end
+
+    def _sync(self) -> None:
+        if self.users is None or _sig(self.db_file) != self._db_sig:
+            self._reload()
+            return
+        log_sig = _sig(self.log_file)
+        if log_sig is None:
+            if self._log_pos:
+                self._reload()  # log apagado por uma compactação noutro processo
+        elif (self._log_ino is not None and log_sig[2] != self._log_ino) or log_sig[1] < self._log_pos:
+            self._reload()  # log recriado ou truncado
+        elif log_sig[1] > self._log_pos:
+            self._read_log()
+
+    def get(self, u: str):
+        self._sync()
+        rec = self.users.get(u)
+        return dict(rec) if rec is not None else None
+
+    def put(self, u: str, record: dict) -> None:
+        line = (json.dumps({"u": u, "rec": record}) + "\n").encode("utf-8")
+        with file_lock(self.db_file):
+            self._sync()
+            fd = os.open(self.log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line)  # uma só escrita em O_APPEND: as linhas não se misturam
+                self._log_ino = os.fstat(fd).st_ino
+            finally:
+                os.close(fd)
+            self.users[u] = dict(record)
+            self.records += 1
+            self._log_pos += len(line)
+            if self.records > max(COMPACT_MIN, len(self.users)):
+                self.compact()
+
+    def load(self) -> dict:
+        self._sync()
+        return {"users": {u: dict(rec) for u, rec in self.users.items()}}
+
+    def compact(self, data: dict = None) -> None:
+        # Snapshot novo (escrita atómica) com o estado atual; o log fica vazio
+        with file_lock(self.db_file):
+            if data is None:
+                self._sync()  # já com o lock: apanha tudo o que outros processos acrescentaram
+                data = {"users": self.users}
+            tmp = self.db_file.with_name(f"{self.db_file.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            tmp.replace(self.db_file)
+            try:
+                self.log_file.unlink()
+            except FileNotFoundError:
+                pass
+            self._reload()
+
+_store = UserStore(DB_FILE, LOG_FILE)
 
 def load_db() -> dict:
-    if not DB_FILE.exists():
-        return {"users": {}}
-    return json.loads(DB_FILE.read_text(encoding="utf-8"))
+    return _store.load()
 
 def save_db(data: dict) -> None:
-    DB_FILE.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    _store.compact(data)
 
 def get_user(u: str) -> dict | None:
-    return load_db()["users"].get(u)
+    return _store.get(u)
 
 def put_user(u: str, record: dict) -> None:
-    db = load_db()
-    db["users"][u] = record
-    save_db(db)
+    # Só o registo alterado é escrito (uma linha no log), não a base inteira
+    _store.put(u, record)
 
 def now() -> float:
     return time.time()
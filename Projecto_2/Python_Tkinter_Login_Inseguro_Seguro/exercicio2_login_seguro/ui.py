@@ -1,8 +1,16 @@
 
+import sys
 import tkinter as tk
+from pathlib import Path
 from tkinter import messagebox
 from auth import authenticate, create_user
 
+# pacote shared/: o 1.º diretório acima que o contenha (o módulo também corre copiado para outro sítio)
+_root = next((d for d in Path(__file__).resolve().parents if (d / "shared").is_dir()), None)
+if _root is not None:
+    sys.path.insert(0, str(_root))
+from shared.tkjobs import BackgroundJob
+
 def ensure_demo_user():
     # Cria utilizador demo se ainda não existir
     try:
@@ -33,9 +41,15 @@ def build_ui():
     lbl_status = tk.Label(root, textvariable=status, fg="green")
     lbl_status.place(x=20, y=135)
 
-    def do_login():
-        u, p = ent_user.get().strip(), ent_pass.get()
-        ok, msg = authenticate(u, p)
+    job = None  # login em curso (BackgroundJob)
+
+    def set_busy(busy):
+        btn_login.config(text="Cancelar" if busy else "Login", state=tk.NORMAL,
+                         command=do_cancel if busy else do_login)
+
+    def on_done(result):
+        ok, msg = result
+        set_busy(False)
         if ok:
             messagebox.showinfo("Login", msg)
             status.set("Autenticado.")
@@ -43,7 +57,37 @@ def build_ui():
             messagebox.showwarning("Aviso", msg)
             status.set("Tenta novamente.")
 
-    tk.Button(root, text="Login", width=10, command=do_login).place(x=130, y=95)
+    def on_cancelled():
+        set_busy(False)
+        status.set("Cancelado (pode ter contado como tentativa falhada).")
+
+    def on_error(exc):
+        set_busy(False)
+        status.set("Erro na autenticação.")
+        messagebox.showerror("Erro", str(exc))
+
+    def do_login():
+        nonlocal job
+        if job and not job.finished:
+            return  # também enquanto um login cancelado ainda corre
+        u, p = ent_user.get().strip(), ent_pass.get()
+        # authenticate (PBKDF2 + ficheiro) num thread à parte; a janela não congela
+        job = BackgroundJob(root, authenticate, u, p, on_done=on_done, on_error=on_error,
+                            on_cancelled=on_cancelled,
+                            on_progress=lambda secs: status.set(f"A verificar... {secs:.1f}s"))
+        set_busy(True)
+        status.set("A verificar...")
+        job.start()
+
+    def do_cancel():
+        if job and job.running:
+            # authenticate não pára a meio: o Login só volta quando ele acabar
+            job.cancel()
+            btn_login.config(text="A cancelar...", state=tk.DISABLED)
+            status.set("A cancelar... (ainda pode contar para o bloqueio)")
+
+    btn_login = tk.Button(root, text="Login", width=10, command=do_login)
+    btn_login.place(x=130, y=95)
     tk.Button(root, text="Sair", width=10, command=root.destroy).place(x=230, y=95)
 
     tk.Label(root, fg="green", text="Exemplo seguro educativo — hashing, salt, lockout.").place(x=20, y=120)
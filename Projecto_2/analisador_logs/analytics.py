@@ -1,29 +1,28 @@
 
 from __future__ import annotations
+import sys
+from array import array
+from pathlib import Path
 from typing import Dict, Any, Iterable
-from collections import Counter
 
-def analyze(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
-    total = 0
-    ok = 0
-    by_ip_fail = Counter()
-    by_user_fail = Counter()
-    suspicious_ips = set()
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from shared.columns import Interner, count_by
 
+def analyze(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    # Uma passagem para internar IP/utilizador em códigos; as contagens são
+    # feitas sobre as colunas (com NumPy, se estiver instalado)
+    ips, users = Interner(), Interner()
+    ip_col, user_col, ok_col = array('i'), array('i'), array('b')
     for r in records:
-        total += 1
-        status = r.get('status')
-        ip = r.get('ip') or 'unknown'
-        user = r.get('user') or 'unknown'
-        if status == 'success':
-            ok += 1
-        else:
-            by_ip_fail[ip] += 1
-            by_user_fail[user] += 1
+        ip_col.append(ips.code(r.get('ip') or 'unknown'))
+        user_col.append(users.code(r.get('user') or 'unknown'))
+        ok_col.append(r.get('status') == 'success')
 
-    for ip, c in by_ip_fail.items():
-        if c >= 3:
-            suspicious_ips.add(ip)
+    total = len(ok_col)
+    ok = count_by(ok_col).get(1, 0)
+    by_ip_fail = {ips.values[c]: n for c, n in count_by(ip_col, ok_col, {0}).items()}
+    by_user_fail = {users.values[c]: n for c, n in count_by(user_col, ok_col, {0}).items()}
+    suspicious_ips = {ip for ip, c in by_ip_fail.items() if c >= 3}
 
     fail = total - ok
     perc_success = (ok / total * 100.0) if total else 0.0
@@ -35,7 +34,7 @@ def analyze(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
         'fail': fail,
         'perc_success': round(perc_success, 2),
         'perc_fail': round(perc_fail, 2),
-        'fail_by_ip': dict(by_ip_fail),
-        'fail_by_user': dict(by_user_fail),
+        'fail_by_ip': by_ip_fail,
+        'fail_by_user': by_user_fail,
         'suspicious_ips': sorted(suspicious_ips),
     }
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Benchmark das agregações por colunas (shared/columns.py) com e sem NumPy.
+
+Gera uma tabela sintética de eventos (códigos inteiros de IP, utilizador e
+resultado) e mede count_by / distinct_by nos dois caminhos, confirmando que os
+dicionários devolvidos são iguais, incluindo a ordem das chaves. Requer NumPy.
+
+    python benchmarks/bench_aggregate.py --rows 10000000
+"""
+import argparse
+import sys
+import time
+from array import array
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import shared.columns as columns  # noqa: E402
+from shared.columns import count_by, distinct_by  # noqa: E402
+
+np = columns.np
+
+
+def synthetic_columns(n: int, n_ips: int, n_users: int, seed: int):
+    rng = np.random.default_rng(seed)
+    cols = []
+    for high in (n_ips, n_users, 4):  # ip, user, result (0=ok, 1..3=falhas)
+        a = array("i")
+        a.frombytes(rng.integers(0, high, n).astype(np.intc).tobytes())
+        cols.append(a)
+    return cols
+
+
+def run_all(ip, user, result):
+    fails = {1, 2, 3}
+    return (count_by(result), count_by(ip, result, fails), count_by(user, result, fails),
+            distinct_by(ip, user, result, fails))
+
+
+def timed(use_numpy: bool, cols):
+    columns.USE_NUMPY = use_numpy
+    t = time.perf_counter()
+    out = run_all(*cols)
+    return time.perf_counter() - t, [list(d.items()) for d in out]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark de count_by/distinct_by (Python vs NumPy).")
+    p.add_argument("--rows", type=int, default=10_000_000)
+    p.add_argument("--ips", type=int, default=50_000)
+    p.add_argument("--users", type=int, default=5_000)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+    if np is None:
+        sys.exit("NumPy não está instalado.")
+
+    cols = synthetic_columns(args.rows, args.ips, args.users, args.seed)
+    t_np, got = timed(True, cols)
+    t_py, expected = timed(False, cols)
+    assert got == expected, "resultados diferentes!"
+    n = args.rows
+    print(f"{'caminho':<8} {'tempo(s)':>9} {'ns/linha':>9}")
+    print(f"{'python':<8} {t_py:>9.3f} {t_py / n * 1e9:>9.0f}")
+    print(f"{'numpy':<8} {t_np:>9.3f} {t_np / n * 1e9:>9.0f}   ({t_py / t_np:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Benchmark de is_ip_blocked com blacklists grandes.
+
+Para cada tamanho, escreve um blacklist.json sintético num diretório
+temporário e mede a latência média de is_ip_blocked (metade IPs bloqueados,
+metade não, e 1/4 dentro das redes CIDR da blacklist) na versão antiga
+(json.load a cada chamada, só IPs exatos) e na atual.
+
+Projecto e Projecto_final têm ambos um módulo `storage`, por isso cada um
+corre num subprocesso próprio.
+
+    python benchmarks/bench_blacklist.py --sizes 1000 100000 300000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+CIDR_ENTRIES = 64
+LEGACY_LOOKUPS = 5  # a versão antiga relê o ficheiro inteiro a cada consulta
+TARGETS = {"projecto": ROOT / "Projecto", "final": ROOT / "Projecto_2" / "Projecto_final"}
+
+
+def ip_of(i: int) -> str:
+    return f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+
+
+def write_blacklist(path: str, n: int, target: str) -> None:
+    far = 4_102_444_800  # 2100-01-01
+    if target == "projecto":
+        bl = {ip_of(i): ({"type": "permanent", "reason": "bench", "since": 0} if i % 2 else
+                         {"type": "temporary", "reason": "bench", "since": 0, "until": far})
+              for i in range(n)}
+    else:
+        bl = {ip_of(i): ({"type": "perm"} if i % 2 else {"type": "temp", "until": "2100-01-01T00:00:00+00:00"})
+              for i in range(n)}
+    # e algumas redes inteiras (uma entrada CIDR por /24)
+    for k in range(CIDR_ENTRIES):
+        bl[f"172.16.{k}.0/24"] = {"type": "permanent", "reason": "bench", "since": 0} if target == "projecto" \
+            else {"type": "perm"}
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(bl, indent=2))
+
+
+def run_target(target: str, sizes, lookups: int) -> None:
+    sys.path.insert(0, str(TARGETS[target]))
+    if target == "projecto":
+        import login_cli as mod
+
+        def legacy(ip):
+            with open(mod.BLACKLIST_PATH, "r", encoding="utf-8") as f:
+                return ip in json.load(f)
+        check = mod.is_ip_blocked
+    else:
+        import storage as mod
+
+        def legacy(ip):
+            return mod.read_json(mod.BLACKLIST_FILE, {}).get(ip) is not None
+        check = mod.is_ip_blocked
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = os.path.join(tmp, f"bl{n}.json")
+            write_blacklist(path, n, target)
+            if target == "projecto":
+                mod.BLACKLIST_PATH = path
+            else:
+                mod.BLACKLIST_FILE = Path(path)
+            ips = [ip_of(i * 7919 % (2 * n)) if i % 4 else f"172.16.{i % 128}.{i % 251}" for i in range(lookups)]
+            t = time.perf_counter()
+            for ip in ips[:LEGACY_LOOKUPS]:
+                legacy(ip)
+            t_old = (time.perf_counter() - t) / LEGACY_LOOKUPS
+            check(ips[0])  # primeira leitura (carrega a cache)
+            t = time.perf_counter()
+            for ip in ips:
+                check(ip)
+            t_new = (time.perf_counter() - t) / lookups
+            print(f"{target:<9} {n:>8} {t_old * 1e6:>12.0f} {t_new * 1e6:>10.1f}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark de is_ip_blocked por tamanho da blacklist.")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 300_000])
+    p.add_argument("--lookups", type=int, default=20_000)
+    p.add_argument("--target", choices=sorted(TARGETS), help=argparse.SUPPRESS)
+    args = p.parse_args()
+    if args.target:
+        run_target(args.target, args.sizes, args.lookups)
+        return
+    print(f"{'projeto':<9} {'IPs':>8} {'antigo(µs)':>12} {'novo(µs)':>10}")
+    for target in TARGETS:
+        subprocess.run([sys.executable, __file__, "--target", target, "--sizes", *map(str, args.sizes),
+                        "--lookups", str(args.lookups)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Benchmark do registo de tentativas: abrir/escrever/fechar por linha vs BufferedLog.
+
+Grava --events linhas CSV num ficheiro temporário: na versão antiga cada
+linha faz stat + open(append) + write + close (como storage.log_line e
+login_cli.record_attempt); na atual vai para a fila do BufferedLog, gravada
+em lote pelo thread de fundo (shared/buflog.py). Mede o tempo por evento
+visto por quem regista e o débito total até ao flush() final, e confirma que
+os dois ficheiros ficam iguais.
+
+    python benchmarks/bench_buflog.py --events 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from shared.buflog import BufferedLog  # noqa: E402
+
+HEADER = "timestamp,username,ip,result\n"
+
+
+def lines(n: int):
+    return [f"2025-11-02 13:07:{i % 60:02d}+0000,user{i % 977},10.0.{i >> 8 & 255}.{i & 255},FAIL\n"
+            for i in range(n)]
+
+
+def legacy(path: str, data) -> None:
+    for line in data:
+        if not os.path.exists(path):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(HEADER)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def buffered(path: str, data) -> float:
+    log = BufferedLog(path, header=HEADER)
+    t0 = time.perf_counter()
+    for line in data:
+        log.write(line)
+    t_caller = time.perf_counter() - t0
+    log.close()
+    return t_caller
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark do registo de tentativas (por linha vs em lote).")
+    p.add_argument("--events", type=int, default=200_000)
+    args = p.parse_args()
+    data = lines(args.events)
+    with tempfile.TemporaryDirectory() as d:
+        old_path, new_path = os.path.join(d, "old.csv"), os.path.join(d, "new.csv")
+        t0 = time.perf_counter()
+        legacy(old_path, data)
+        t_old = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        t_caller = buffered(new_path, data)
+        t_new = time.perf_counter() - t0
+        with open(old_path, "rb") as a, open(new_path, "rb") as b:
+            assert a.read() == b.read()
+    n = args.events
+    print(f"por linha : {t_old / n * 1e6:7.2f} µs/evento | {n / t_old:12,.0f} eventos/s")
+    print(f"em lote   : {t_caller / n * 1e6:7.2f} µs/evento (quem regista) | "
+          f"{n / t_new:12,.0f} eventos/s até ao flush ({t_old / t_new:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
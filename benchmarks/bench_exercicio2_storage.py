@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Benchmark do storage do exercicio2_login_seguro: JSON inteiro vs snapshot + log.
+
+Para cada tamanho, cria um users_secure.json sintético e mede o custo de
+armazenamento de um login (get_user + put_user, sem o PBKDF2). A versão
+antiga lê o ficheiro duas vezes e reescreve-o uma; a atual lê do índice em
+memória e acrescenta uma linha ao log.
+
+    python benchmarks/bench_exercicio2_storage.py --sizes 1000 100000 500000
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "Projecto_2" / "Python_Tkinter_Login_Inseguro_Seguro" / "exercicio2_login_seguro"))
+import storage  # noqa: E402
+
+LEGACY_LOGINS = 3
+
+
+def legacy_login(path: Path, u: str) -> None:
+    rec = json.loads(path.read_text(encoding="utf-8"))["users"].get(u)
+    rec["fail_count"] += 1
+    db = json.loads(path.read_text(encoding="utf-8"))
+    db["users"][u] = rec
+    path.write_text(json.dumps(db, indent=2), encoding="utf-8")
+
+
+def run(n: int, logins: int) -> None:
+    rnd = random.Random(n)
+    users = {f"user{i:07d}": {"salt": "A" * 24, "hash": "B" * 44, "iterations": 120000,
+                              "fail_count": 0, "locked_until": 0.0} for i in range(n)}
+    names = [f"user{rnd.randrange(n):07d}" for _ in range(logins)]
+    with tempfile.TemporaryDirectory() as d:
+        db_file = Path(d) / "users_secure.json"
+        db_file.write_text(json.dumps({"users": users}, indent=2), encoding="utf-8")
+        t0 = time.perf_counter()
+        for u in names[:LEGACY_LOGINS]:
+            legacy_login(db_file, u)
+        t_old = (time.perf_counter() - t0) / LEGACY_LOGINS
+
+        store = storage.UserStore(db_file, db_file.with_suffix(".log"))
+        store.get(names[0])  # carga inicial do índice, uma vez por processo
+        t0 = time.perf_counter()
+        for u in names:
+            rec = store.get(u)
+            rec["fail_count"] += 1
+            store.put(u, rec)
+        t_new = (time.perf_counter() - t0) / logins
+        fresh = storage.UserStore(db_file, db_file.with_suffix(".log"))
+        assert fresh.get(names[-1]) == store.get(names[-1])
+
+    print(f"{n:>9,} utilizadores: json {t_old * 1e3:9.2f} ms/login | log {t_new * 1e3:6.3f} ms/login "
+          f"({t_old / t_new:,.0f}x)")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark do storage do exercicio2 (JSON vs snapshot + log).")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 500_000])
+    p.add_argument("--logins", type=int, default=5000)
+    args = p.parse_args()
+    for n in args.sizes:
+        run(n, args.logins)
+
+
+if __name__ == "__main__":
+    main()
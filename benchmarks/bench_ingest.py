@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Benchmark da leitura do log para colunas: sequencial vs paralela (shared/ingest.py).
+
+Escreve um CSV sintético no formato de Projecto/logs_exemplo.csv num ficheiro
+temporário e mede analytics.load_columns() com 1 e com N processos,
+confirmando que as tabelas são iguais.
+
+    python benchmarks/bench_ingest.py --rows 2000000 --workers 2 4 8
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "Projecto"))
+import analytics  # noqa: E402
+
+
+def write_log(path: str, n: int, seed: int) -> None:
+    rnd = random.Random(seed)
+    t = datetime(2025, 10, 31, 15, 20, 5, 481371)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("timestamp,username,ip,result\n")
+        for _ in range(n):
+            t += timedelta(microseconds=rnd.randrange(1, 2_000_000))
+            ip = f"10.{rnd.randrange(256)}.{rnd.randrange(256)}.{rnd.randrange(4)}"
+            f.write(f"{t.isoformat()},user{rnd.randrange(2000)},{ip},{rnd.choice(('ok', 'fail_bad_pwd'))}\n")
+
+
+def same_table(a, b) -> bool:
+    return (a.ts == b.ts and a.user == b.user and a.ip == b.ip and a.result == b.result
+            and a.users.values == b.users.values and a.ips.values == b.ips.values)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark de leitura sequencial vs paralela.")
+    p.add_argument("--rows", type=int, default=2_000_000)
+    p.add_argument("--workers", type=int, nargs="+", default=[2, 4, os.cpu_count() or 1])
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        analytics.LOG_PATH = os.path.join(tmp, "logs.csv")
+        write_log(analytics.LOG_PATH, args.rows, args.seed)
+        mb = os.path.getsize(analytics.LOG_PATH) / 1e6
+        print(f"{args.rows} linhas, {mb:.0f} MB")
+        print(f"{'processos':>9} {'tempo(s)':>9} {'MB/s':>7} {'speedup':>8}")
+        t = time.perf_counter()
+        base = analytics.load_columns()
+        t1 = time.perf_counter() - t
+        print(f"{1:>9} {t1:>9.3f} {mb / t1:>7.1f} {1.0:>7.1f}x")
+        for w in sorted(set(w for w in args.workers if w > 1)):
+            t = time.perf_counter()
+            table = analytics.load_columns(workers=w)
+            dt = time.perf_counter() - t
+            assert same_table(base, table), "tabelas diferentes!"
+            print(f"{w:>9} {dt:>9.3f} {mb / dt:>7.1f} {t1 / dt:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
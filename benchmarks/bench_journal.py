@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Benchmark da gravação da blacklist: reescrita completa vs journal.
+
+Para cada tamanho, parte de uma blacklist sintética e grava --writes
+bloqueios novos, um de cada vez: na versão antiga cada gravação reescreve o
+ficheiro inteiro (json.dump com indent=2); na atual acrescenta uma linha ao
+journal (com fsync), compactando quando o journal passa o tamanho da
+blacklist (shared/journal.py). No fim confirma que a leitura (snapshot +
+journal) devolve a mesma blacklist.
+
+    python benchmarks/bench_journal.py --sizes 1000 100000 300000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from shared.journal import read_blacklist, save_blacklist  # noqa: E402
+
+
+def ip_of(i: int) -> str:
+    return f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+
+
+def write_full(path: str, bl) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(bl, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def run(n: int, writes: int) -> None:
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "blacklist.json")
+        base = {ip_of(i): {"type": "perm"} if i % 2 else {"type": "temp", "until": "2100-01-01T00:00:00+00:00"}
+                for i in range(n)}
+        new = [(ip_of(n + i), {"type": "perm"}) for i in range(writes)]
+
+        bl = dict(base)
+        t0 = time.perf_counter()
+        for ip, rec in new:
+            bl[ip] = rec
+            write_full(path, bl)
+        t_old = (time.perf_counter() - t0) / writes
+        expected = bl
+
+        write_full(path, base)
+        bl = read_blacklist(path)
+        t0 = time.perf_counter()
+        for ip, rec in new:
+            bl[ip] = rec
+            save_blacklist(bl, path, lambda data: write_full(path, data))
+        t_new = (time.perf_counter() - t0) / writes
+        assert read_blacklist(path) == expected
+
+    print(f"{n:>9,} entradas: reescrita {t_old * 1e3:9.2f} ms/bloqueio | "
+          f"journal {t_new * 1e3:7.3f} ms/bloqueio ({t_old / t_new:,.0f}x)")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark da gravação da blacklist (reescrita vs journal).")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 300_000])
+    p.add_argument("--writes", type=int, default=20)
+    args = p.parse_args()
+    for n in args.sizes:
+        run(n, args.writes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Benchmark das verificações PBKDF2: em série vs KdfPool com asyncio.
+
+Faz --logins verificações (metade certas, metade erradas) com as iterações
+do Projecto (200 000): primeiro uma a uma no thread principal, depois todas
+ao mesmo tempo com asyncio.gather sobre `await pool.verify(...)`
+(shared/kdfpool.py), para 1, 2, 4, ... threads até ao nº de núcleos.
+O ganho é limitado pelos núcleos disponíveis.
+
+    python benchmarks/bench_kdfpool.py --logins 64
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from shared.kdfpool import KdfPool, pbkdf2_verify  # noqa: E402
+
+ITERATIONS = 200_000
+
+
+def make_cases(n: int):
+    salt = os.urandom(16)
+    good = hashlib.pbkdf2_hmac("sha256", b"Password123!", salt, ITERATIONS, 32)
+    return [("Password123!" if i % 2 else "errada", salt, good) for i in range(n)]
+
+
+async def run_pool(pool: KdfPool, cases):
+    return await asyncio.gather(*(pool.verify(p, s, h, ITERATIONS, 32) for p, s, h in cases))
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark de verificações PBKDF2 (em série vs pool).")
+    p.add_argument("--logins", type=int, default=64)
+    args = p.parse_args()
+    cases = make_cases(args.logins)
+    cores = os.cpu_count() or 1
+
+    t0 = time.perf_counter()
+    expected = [pbkdf2_verify(pw, s, h, ITERATIONS, 32) for pw, s, h in cases]
+    t_serial = time.perf_counter() - t0
+    print(f"núcleos: {cores}")
+    print(f"em série      : {args.logins / t_serial:7.1f} verificações/s")
+
+    workers = 1
+    while True:
+        pool = KdfPool(workers=workers)
+        t0 = time.perf_counter()
+        got = asyncio.run(run_pool(pool, cases))
+        t_pool = time.perf_counter() - t0
+        pool.shutdown()
+        assert got == expected
+        print(f"pool {workers:2d} thread(s): {args.logins / t_pool:7.1f} verificações/s ({t_serial / t_pool:.1f}x)")
+        if workers >= cores:
+            break
+        workers = min(workers * 2, cores)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Teste de carga: N processos de login sobre os mesmos users.json / log / blacklist.
+
+Cada processo faz --logins "logins": incrementa o contador do utilizador no
+users.json (ler-alterar-gravar), acrescenta uma linha ao log e, a cada 10
+logins, bloqueia um IP na blacklist (journal). Com locks (shared/locking.py),
+no fim o total dos contadores, as linhas do log e os IPs bloqueados têm de
+bater certo com o que foi feito; sem locks (tmp + replace como antes),
+mostra-se quantas atualizações se perderam.
+
+Depois, o caminho de login real: N processos fazem --attempts tentativas com
+a password errada para a mesma conta, com login_cli.login_attempt (Projecto)
+e auth.authenticate (Projecto_final), cada projeto copiado para um diretório
+temporário. Cada "Credenciais inválidas" devolvida tem de ter somado uma falha
+ao contador de lockout (as restantes tentativas são recusadas pelo backoff).
+
+    python benchmarks/bench_locking.py --procs 1 2 4 8 --logins 300 --attempts 5
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from shared.journal import read_blacklist, save_blacklist  # noqa: E402
+from shared.locking import file_lock, json_transaction, write_json_atomic  # noqa: E402
+
+USERS = 200
+TARGETS = {"projecto": ROOT / "Projecto", "final": ROOT / "Projecto_2" / "Projecto_final"}
+VICTIM, IP = "victim", "192.168.1.10"
+ITERATIONS = 1000  # PBKDF2 baixo: interessa o contador, não o custo do hash
+
+
+def login_locked(d: str, worker: int, i: int) -> None:
+    users_path, log_path, bl_path = (os.path.join(d, f) for f in ("users.json", "log.csv", "blacklist.json"))
+    with json_transaction(users_path) as users:
+        users[f"u{i % USERS}"]["logins"] += 1
+    with file_lock(log_path):
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(f"{worker},{i},FAIL\n")
+    if i % 10 == 0:
+        bl = read_blacklist(bl_path)
+        bl[f"10.{worker}.{i >> 8 & 255}.{i & 255}"] = {"type": "perm"}
+        save_blacklist(bl, bl_path, lambda data: write_json_atomic(bl_path, data))
+
+
+def login_unlocked(d: str, worker: int, i: int) -> None:
+    users_path, log_path = os.path.join(d, "users.json"), os.path.join(d, "log.csv")
+    with open(users_path, "r", encoding="utf-8") as f:
+        users = json.load(f)
+    users[f"u{i % USERS}"]["logins"] += 1
+    write_json_atomic(users_path, users)
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(f"{worker},{i},FAIL\n")
+
+
+def worker_main(d: str, worker: int, logins: int, locked: bool, start) -> None:
+    start.wait()
+    login = login_locked if locked else login_unlocked
+    for i in range(logins):
+        login(d, worker, i)
+
+
+def run(procs: int, logins: int, locked: bool) -> None:
+    with tempfile.TemporaryDirectory() as d:
+        with open(os.path.join(d, "users.json"), "w", encoding="utf-8") as f:
+            json.dump({f"u{i}": {"logins": 0} for i in range(USERS)}, f)
+        start = mp.Barrier(procs + 1)
+        ps = [mp.Process(target=worker_main, args=(d, w, logins, locked, start)) for w in range(procs)]
+        for p in ps:
+            p.start()
+        start.wait()
+        t0 = time.perf_counter()
+        for p in ps:
+            p.join()
+        elapsed = time.perf_counter() - t0
+        with open(os.path.join(d, "users.json"), "r", encoding="utf-8") as f:
+            counted = sum(u["logins"] for u in json.load(f).values())
+        with open(os.path.join(d, "log.csv"), "r", encoding="utf-8") as f:
+            lines = sum(1 for _ in f)
+        blocked = len(read_blacklist(os.path.join(d, "blacklist.json"))) if locked else 0
+    total = procs * logins
+    expected_blocked = procs * len(range(0, logins, 10))
+    status = f"perdidas {total - counted:5d}"
+    if locked:
+        assert counted == total and lines == total and blocked == expected_blocked, (counted, lines, blocked)
+        status = "sem perdas"
+    print(f"{'com locks' if locked else 'sem locks'} N={procs:2d}: {total / elapsed:8,.0f} logins/s | "
+          f"contador {counted}/{total} | log {lines}/{total} | {status}")
+
+
+# --- caminho de login real (módulos do projeto importados só nos subprocessos) ---
+
+def _enter(target: str, d: str):
+    sys.path[:0] = [d, str(ROOT)]
+    os.chdir(d)  # o Projecto usa caminhos relativos
+    import auth
+    auth.PBKDF2_ITERATIONS = ITERATIONS
+    return auth
+
+
+def login_setup(target: str, d: str) -> None:
+    auth = _enter(target, d)
+    if target == "projecto":
+        import storage
+        salt = auth.gen_salt()
+        storage.upsert_user(VICTIM, salt, auth.hash_password("Password123!", salt))
+    else:
+        auth.create_user(VICTIM, "Password123!")
+
+
+def login_worker(target: str, d: str, attempts: int, start, out) -> None:
+    auth = _enter(target, d)
+    start.wait()
+    fails = 0
+    if target == "projecto":
+        import login_cli
+        for _ in range(attempts):
+            res, _msg = login_cli.login_attempt(VICTIM, IP, lambda: "errada")
+            fails += res == "fail_bad_pwd"
+        login_cli._attempts.close()
+    else:
+        import logger
+        for _ in range(attempts):
+            _ok, msg = auth.authenticate(VICTIM, "errada", IP)
+            fails += msg == "Credenciais inválidas."
+        logger._log.close()
+    out.put(fails)
+
+
+def login_counter(target: str, d: str, out) -> None:
+    _enter(target, d)
+    import storage
+    st = storage.get_lockout(VICTIM)
+    out.put(st["fails"] if target == "projecto" else st["failed_attempts"])
+
+
+def run_login(target: str, procs: int, attempts: int) -> None:
+    with tempfile.TemporaryDirectory() as d:
+        for src in TARGETS[target].glob("*.py"):
+            shutil.copy(src, d)
+        out = mp.Queue()
+        p = mp.Process(target=login_setup, args=(target, d))
+        p.start()
+        p.join()
+        start = mp.Barrier(procs + 1)
+        ps = [mp.Process(target=login_worker, args=(target, d, attempts, start, out)) for _ in range(procs)]
+        for p in ps:
+            p.start()
+        start.wait()
+        t0 = time.perf_counter()
+        fails = sum(out.get() for _ in ps)
+        for p in ps:
+            p.join()
+        elapsed = time.perf_counter() - t0
+        p = mp.Process(target=login_counter, args=(target, d, out))
+        p.start()
+        counted = out.get()
+        p.join()
+    assert counted == fails, (target, counted, fails)
+    print(f"login {target:<8} N={procs:2d}: {procs * attempts / elapsed:8,.0f} tentativas/s | "
+          f"falhas devolvidas {fails} | contador {counted} | sem perdas")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Teste de carga de logins em vários processos (com e sem locks).")
+    p.add_argument("--procs", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--logins", type=int, default=300)
+    p.add_argument("--attempts", type=int, default=5, help="tentativas falhadas por processo no login real")
+    args = p.parse_args()
+    for n in args.procs:
+        run(n, args.logins, locked=False)
+        run(n, args.logins, locked=True)
+    for target in TARGETS:
+        for n in args.procs:
+            run_login(target, n, args.attempts)
+
+
+if __name__ == "__main__":
+    main()
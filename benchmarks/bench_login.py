@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""Benchmark de logins de ponta a ponta nos três projetos, sem terminal nem janela.
+
+Para cada projeto e cada tamanho, copia os .py do projeto para um diretório
+temporário (os dados ficam ao lado do código, como no uso normal), cria uma
+base sintética com N contas e uma blacklist, e faz --ops tentativas com uma
+mistura configurável de casos:
+
+    success       conta existente, password certa, IP limpo
+    bad_password  conta existente, password errada
+    unknown_user  conta inexistente
+    blocked_ip    IP na blacklist
+
+Alvos: Projecto (login_cli.login_attempt, a lógica de login() sem input),
+Projecto_final (is_ip_blocked + auth.authenticate, como cmd_login) e
+exercicio2_login_seguro (auth.authenticate; sem IP, por isso blocked_ip não
+se aplica e a mistura é renormalizada sem esse caso). Mostra a latência
+p50/p95/p99, as operações/s, a 1.ª tentativa à parte (cargas a frio) e os
+resultados obtidos. As contas de bad_password são percorridas por ordem para
+não caírem logo em backoff; com poucas contas e muitas operações aparecem
+também bloqueios de conta.
+
+Cada (projeto, tamanho) corre num subprocesso próprio (os três têm módulos
+`storage`/`auth`). --iterations baixa o PBKDF2 para medir o resto do caminho;
+por omissão usam-se as iterações de cada projeto.
+
+    python benchmarks/bench_login.py --sizes 1000 100000 1000000 \\
+        --mix success=70,bad_password=20,unknown_user=5,blocked_ip=5
+"""
+import argparse
+import base64
+import json
+import math
+import os
+import random
+import secrets
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+TARGETS = {
+    "projecto": ROOT / "Projecto",
+    "final": ROOT / "Projecto_2" / "Projecto_final",
+    "exercicio2": ROOT / "Projecto_2" / "Python_Tkinter_Login_Inseguro_Seguro" / "exercicio2_login_seguro",
+}
+KINDS = ("success", "bad_password", "unknown_user", "blocked_ip")
+PASSWORD = "Password123!"
+CLEAN_IP = "192.168.1.10"
+
+
+def username(i: int) -> str:
+    return f"user{i:07d}"
+
+
+def blocked_ip(i: int) -> str:
+    return f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+
+
+def parse_mix(text: str):
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise argparse.ArgumentTypeError(f"caso desconhecido: {kind!r} (usar {', '.join(KINDS)})")
+        mix[kind] = float(weight)
+    if sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("a mistura precisa de pelo menos um peso positivo")
+    return mix
+
+
+def make_ops(mix, n_users: int, n_blocked: int, ops: int, seed: int):
+    # Sequência de (caso, utilizador, IP, password); bad_password percorre as contas
+    # ímpares por ordem e success usa as pares, para as falhas não bloquearem os sucessos
+    rng = random.Random(seed)
+    kinds = [k for k in KINDS if mix.get(k)]
+    weights = [mix[k] for k in kinds]
+    bad = 0
+    out = []
+    for kind in rng.choices(kinds, weights, k=ops):
+        if kind == "success":
+            out.append((kind, username(rng.randrange(0, n_users, 2)), CLEAN_IP, PASSWORD))
+        elif kind == "bad_password":
+            out.append((kind, username((2 * bad + 1) % n_users), CLEAN_IP, "errada"))
+            bad += 1
+        elif kind == "unknown_user":
+            out.append((kind, f"ghost{rng.randrange(10**9)}", CLEAN_IP, PASSWORD))
+        else:
+            out.append((kind, username(rng.randrange(n_users)), blocked_ip(rng.randrange(n_blocked)), PASSWORD))
+    return out
+
+
+def write_json(path: str, data) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data))
+
+
+# --- preparação de cada projeto (no diretório temporário, já com os módulos importáveis) ---
+
+def setup_projecto(n: int, n_blocked: int, iterations):
+    import auth
+    import login_cli
+    if iterations:
+        auth.PBKDF2_ITERATIONS = iterations
+    salt = auth.gen_salt()
+    rec = {"salt": salt, "hash": auth.hash_password(PASSWORD, salt), "created_at": 0}
+    write_json("users.json", {username(i): rec for i in range(n)})
+    write_json(login_cli.BLACKLIST_PATH, {blocked_ip(i): {"type": "permanent", "reason": "bench", "since": 0}
+                                          for i in range(n_blocked)})
+
+    def attempt(user, ip, pwd):
+        result, _msg = login_cli.login_attempt(user, ip, lambda: pwd)
+        return result
+    return attempt, login_cli._attempts.close
+
+
+def _outcome(ok: bool, msg: str) -> str:
+    if ok:
+        return "success"
+    return "locked" if msg.startswith("Conta") else "fail"
+
+
+def setup_final(n: int, n_blocked: int, iterations):
+    import auth
+    import logger
+    import storage
+    import userdb
+    if iterations:
+        auth.PBKDF2_ITERATIONS = iterations
+    salt = secrets.token_bytes(16)
+    rec = {"salt": salt.hex(), "hash": auth._hash_password(PASSWORD, salt),
+           "failed_attempts": 0, "lockout_until": None, "last_failed": None}
+    userdb.put_users(storage.USERS_DB, {username(i): rec for i in range(n)})
+    write_json(str(storage.BLACKLIST_FILE), {blocked_ip(i): {"type": "perm"} for i in range(n_blocked)})
+    storage.ensure_log_headers()
+
+    def attempt(user, ip, pwd):
+        if storage.is_ip_blocked(ip):
+            return "blocked"
+        return _outcome(*auth.authenticate(user, pwd, ip))
+    return attempt, logger._log.close
+
+
+def setup_exercicio2(n: int, n_blocked: int, iterations):
+    import auth
+    import storage
+    its = iterations or auth.PBKDF2_ITERATIONS
+    salt = secrets.token_bytes(16)
+    rec = {"salt": base64.b64encode(salt).decode(), "hash": base64.b64encode(auth._pbkdf2(PASSWORD, salt, its)).decode(),
+           "iterations": its, "fail_count": 0, "locked_until": 0.0}
+    write_json(str(storage.DB_FILE), {"users": {username(i): rec for i in range(n)}})
+
+    def attempt(user, _ip, pwd):
+        return _outcome(*auth.authenticate(user, pwd))
+    return attempt, lambda: None
+
+
+SETUP = {"projecto": setup_projecto, "final": setup_final, "exercicio2": setup_exercicio2}
+
+
+def percentile(sorted_vals, q: float) -> float:
+    # nearest-rank
+    if not sorted_vals:
+        return 0.0
+    k = max(0, math.ceil(q / 100 * len(sorted_vals)) - 1)
+    return sorted_vals[k]
+
+
+def run_target(target: str, n: int, args) -> None:
+    mix = dict(args.mix)
+    if target == "exercicio2":
+        mix.pop("blocked_ip", None)  # login sem IP
+    with tempfile.TemporaryDirectory() as tmp:
+        for src in TARGETS[target].glob("*.py"):
+            shutil.copy(src, tmp)
+        sys.path[:0] = [tmp, str(ROOT)]  # módulos do projeto, depois o pacote shared/
+        os.chdir(tmp)                    # o Projecto usa caminhos relativos
+
+        t0 = time.perf_counter()
+        attempt, close = SETUP[target](n, args.blocked, args.iterations)
+        build = time.perf_counter() - t0
+        ops = make_ops(mix, n, args.blocked, args.ops, args.seed) if sum(mix.values()) else []
+
+        t0 = time.perf_counter()
+        attempt("ghost-warmup", CLEAN_IP, PASSWORD)  # 1.ª tentativa: carrega caches/índices
+        first = time.perf_counter() - t0
+
+        lat = []
+        outcomes = {}
+        deadline = time.perf_counter() + args.max_seconds
+        start = time.perf_counter()
+        for _kind, user, ip, pwd in ops:
+            t0 = time.perf_counter()
+            res = attempt(user, ip, pwd)
+            t1 = time.perf_counter()
+            lat.append(t1 - t0)
+            outcomes[res] = outcomes.get(res, 0) + 1
+            if t1 > deadline:
+                break
+        elapsed = time.perf_counter() - start
+        close()  # grava o log em fila ainda dentro do diretório temporário
+        os.chdir(ROOT)
+    lat.sort()
+    print(json.dumps({
+        "target": target, "users": n, "build": build, "first": first, "ops": len(lat),
+        "p50": percentile(lat, 50), "p95": percentile(lat, 95), "p99": percentile(lat, 99),
+        "ops_s": len(lat) / elapsed if elapsed else 0.0, "outcomes": outcomes,
+    }))
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark de logins (latência p50/p95/p99 e ops/s) por tamanho da base.")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    p.add_argument("--targets", nargs="+", choices=sorted(TARGETS), default=list(TARGETS))
+    p.add_argument("--mix", type=parse_mix, default=parse_mix("success=70,bad_password=20,unknown_user=5,blocked_ip=5"),
+                   help="pesos por caso, p.ex. success=70,bad_password=20,unknown_user=5,blocked_ip=5")
+    p.add_argument("--ops", type=int, default=1000, help="tentativas por (projeto, tamanho)")
+    p.add_argument("--max-seconds", type=float, default=30.0, help="pára mais cedo se as tentativas demorarem mais")
+    p.add_argument("--blocked", type=int, default=1000, help="IPs na blacklist")
+    p.add_argument("--iterations", type=int, help="iterações PBKDF2 (por omissão, as de cada projeto)")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--target", choices=sorted(TARGETS), help=argparse.SUPPRESS)
+    args = p.parse_args()
+    if args.target:
+        run_target(args.target, args.sizes[0], args)
+        return
+
+    print(f"{'projeto':<11} {'contas':>9} {'criação(s)':>10} {'1.ª(ms)':>9} {'ops':>6} "
+          f"{'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'ops/s':>9}  resultados")
+    mix_arg = ",".join(f"{k}={v}" for k, v in args.mix.items())
+    for target in args.targets:
+        for n in args.sizes:
+            cmd = [sys.executable, __file__, "--target", target, "--sizes", str(n), "--mix", mix_arg,
+                   "--ops", str(args.ops), "--max-seconds", str(args.max_seconds),
+                   "--blocked", str(args.blocked), "--seed", str(args.seed)]
+            if args.iterations:
+                cmd += ["--iterations", str(args.iterations)]
+            out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, text=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            res = " ".join(f"{k}={v}" for k, v in sorted(r["outcomes"].items()))
+            print(f"{target:<11} {n:>9} {r['build']:>10.1f} {r['first'] * 1e3:>9.1f} {r['ops']:>6} "
+                  f"{r['p50'] * 1e3:>9.2f} {r['p95'] * 1e3:>9.2f} {r['p99'] * 1e3:>9.2f} {r['ops_s']:>9.1f}  {res}")
+    if "exercicio2" in args.targets and args.mix.get("blocked_ip"):
+        print("nota: exercicio2 não recebe IP; blocked_ip foi retirado da mistura e os restantes pesos renormalizados.")
+
+
+if __name__ == "__main__":
+    main()
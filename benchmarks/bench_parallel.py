@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Benchmark da avaliação de regras repartida por processos (shared/parallel.py).
+
+Gera uma EventTable sintética de falhas (muitos IPs, alguns em força bruta)
+e mede evaluate_sharded com 1, 2, 4, ... processos, confirmando que os
+disparos são sempre iguais aos de um só processo.
+
+    python benchmarks/bench_parallel.py --fails 2000000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.columns import EventTable  # noqa: E402
+from shared.parallel import evaluate_sharded  # noqa: E402
+from shared.rules import DEFAULT_RULES  # noqa: E402
+
+
+def synthetic_table(n: int, n_ips: int, seed: int) -> EventTable:
+    rnd = random.Random(seed)
+    t = EventTable()
+    ts = 1_759_276_800.0
+    for _ in range(n):
+        ts += rnd.expovariate(1 / 0.5)
+        if rnd.random() < 0.2:  # força bruta: poucos IPs, muitas falhas
+            ip = f"203.0.113.{rnd.randrange(50)}"
+        else:
+            ip = f"10.{rnd.randrange(256)}.{rnd.randrange(256)}.{rnd.randrange(n_ips // 65536 + 1)}"
+        t.append(ts, f"user{rnd.randrange(2000)}", ip, "FAIL")
+    return t
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark de evaluate_sharded por nº de processos.")
+    p.add_argument("--fails", type=int, default=2_000_000)
+    p.add_argument("--ips", type=int, default=200_000)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    table = synthetic_table(args.fails, args.ips, args.seed)
+    codes = table.results.codes_where(lambda r: r == "FAIL")
+    base = None
+    print(f"{'processos':>9} {'tempo(s)':>9} {'speedup':>8} {'IPs':>6}")
+    for w in sorted(set(args.workers)):
+        t = time.perf_counter()
+        fired = evaluate_sharded(table, codes, DEFAULT_RULES, w)
+        dt = time.perf_counter() - t
+        result = [(k, [r["name"] for r in rules], last) for k, (rules, last) in fired.items()]
+        if base is None:
+            base, t1 = result, dt
+        assert result == base, "resultados diferentes!"
+        print(f"{w:>9} {dt:>9.3f} {t1 / dt:>7.1f}x {len(result):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Benchmark da regra 3 ("utilizadores dispersos") de Projecto/analytics.py.
+
+Simula um IP de botnet que faz um spray denso de falhas dentro da janela de
+10 minutos sem nunca chegar ao limiar de utilizadores distintos (pior caso:
+a janela nunca é disparada e cresce até ao tamanho máximo).
+
+Compara a versão antiga (set() sobre a janela inteira em cada evento, O(n·w))
+com o motor de regras partilhado (shared/rules.py, contagem incremental, O(n)).
+O custo por evento da versão nova deve manter-se constante à medida que n cresce.
+
+    python benchmarks/bench_scattered_users.py --sizes 10000 100000 1000000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "Projecto"))
+import analytics  # noqa: E402
+from shared.rules import RuleEngine  # noqa: E402
+
+LEGACY_MAX_EVENTS = 20_000  # acima disto a versão antiga demora minutos
+
+
+def legacy_distinct_window_hit(fails: List[Tuple[float, str]], window: float, threshold: int) -> bool:
+    # Cópia da implementação original (apenas para comparação)
+    i = 0
+    for j in range(len(fails)):
+        tsj, _ = fails[j]
+        while tsj - fails[i][0] > window:
+            i += 1
+        if len(set(u for _, u in fails[i:j+1])) >= threshold:
+            return True
+    return False
+
+
+def synthetic_spray(n: int, rate: float) -> List[Tuple[float, str]]:
+    # `rate` falhas/segundo, a rodar por (limiar - 1) utilizadores
+    users = [f"victim{k}" for k in range(analytics.SCATTERED_USERS - 1)]
+    t0 = 1_761_900_000.0
+    return [(t0 + k / rate, users[k % len(users)]) for k in range(n)]
+
+
+def engine_distinct_window_hit(fails: List[Tuple[float, str]], window: float, threshold: int) -> bool:
+    rule = {"name": "scattered_users", "count": threshold, "window": window, "distinct": "user",
+            "action": "temp", "block_secs": analytics.SCATTERED_BLOCK_SECS}
+    engine = RuleEngine([rule], fields=("user",))
+    hit = False
+    for ts, user in fails:
+        if engine.feed("botnet", ts, (user,)):
+            hit = True
+    return hit
+
+
+def timed(fn, *args) -> Tuple[float, bool]:
+    t = time.perf_counter()
+    hit = fn(*args)
+    return time.perf_counter() - t, hit
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark da janela de utilizadores distintos (regra 3).")
+    p.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    p.add_argument("--rate", type=float, default=2000.0, help="falhas por segundo no spray")
+    args = p.parse_args()
+
+    window = analytics.SCATTERED_WINDOW_MIN * 60
+    threshold = analytics.SCATTERED_USERS
+    print(f"{'eventos':>10} {'novo (s)':>10} {'ns/evento':>10} {'antigo (s)':>11} {'ns/evento':>10}")
+    for n in args.sizes:
+        fails = synthetic_spray(n, args.rate)
+        t_new, hit_new = timed(engine_distinct_window_hit, fails, window, threshold)
+        line = f"{n:>10} {t_new:>10.3f} {t_new / n * 1e9:>10.0f}"
+        if n <= LEGACY_MAX_EVENTS:
+            t_old, hit_old = timed(legacy_distinct_window_hit, fails, window, threshold)
+            assert hit_old == hit_new, "resultados diferentes!"
+            line += f" {t_old:>11.3f} {t_old / n * 1e9:>10.0f}"
+        else:
+            line += f" {'-':>11} {'-':>10}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Benchmark da descodificação de timestamps (shared/timeparse.py).
+
+Compara o parser original de Projecto_final (analyzer._parse_ts: strptime com
+fallback para fromisoformat) com o descodificador escolhido por
+make_ts_decoder, e confirma que os resultados são iguais. Como referência,
+mede também Projecto/analytics.parse_ts, que já usa fromisoformat (em C).
+
+    python benchmarks/bench_timestamps.py --rows 1000000
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "Projecto"))
+sys.path.insert(0, str(ROOT / "Projecto_2" / "Projecto_final"))
+import analytics  # noqa: E402
+import analyzer  # noqa: E402
+from shared.timeparse import make_ts_decoder  # noqa: E402
+
+FORMATS = {
+    # nome -> (formatação, parser original)
+    "final %z": (lambda dt: dt.strftime(analyzer.DTFMT), analyzer._parse_ts),
+    "final iso": (lambda dt: dt.isoformat(), analyzer._parse_ts),
+    "projecto iso": (lambda dt: dt.replace(tzinfo=None).isoformat(), analytics.parse_ts),
+}
+
+
+def synthetic_timestamps(n: int, fmt: Callable[[datetime], str]) -> List[str]:
+    # ~1 evento/segundo com microssegundos, como nos logs reais
+    t0 = datetime(2025, 10, 30, tzinfo=timezone.utc)
+    return [fmt(t0 + timedelta(seconds=k * 0.9, microseconds=(k * 7919) % 1_000_000)) for k in range(n)]
+
+
+def timed_parse(fn: Callable[[str], float], stamps: List[str]):
+    t = time.perf_counter()
+    out = [fn(s) for s in stamps]
+    return time.perf_counter() - t, out
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark de parsing de timestamps.")
+    p.add_argument("--rows", type=int, default=1_000_000)
+    args = p.parse_args()
+
+    n = args.rows
+    print(f"{'formato':<14} {'antigo(s)':>9} {'ns/linha':>9} {'novo(s)':>9} {'ns/linha':>9} {'ganho':>8}")
+    for name, (fmt, slow) in FORMATS.items():
+        stamps = synthetic_timestamps(n, fmt)
+        t_slow, expected = timed_parse(slow, stamps)
+        fast = make_ts_decoder(stamps[0], slow, naive_utc=slow is analyzer._parse_ts)
+        t_fast, got = timed_parse(fast, stamps)
+        assert got == expected, f"{name}: resultados diferentes!"
+        print(f"{name:<14} {t_slow:>9.3f} {t_slow / n * 1e9:>9.0f} {t_fast:>9.3f} {t_fast / n * 1e9:>9.0f} {t_slow / t_fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
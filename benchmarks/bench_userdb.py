@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Benchmark do acesso aos utilizadores do Projecto_final: users.json vs SQLite.
+
+Para cada tamanho, cria uma base sintética e mede o custo da parte de
+armazenamento de um login (sem o PBKDF2): ler o utilizador e gravar o
+resultado (failed_attempts/last_failed). A versão antiga lê e reescreve o
+users.json inteiro; a atual (userdb.py) faz um SELECT e um UPDATE pela chave
+primária numa base em modo WAL.
+
+    python benchmarks/bench_userdb.py --sizes 1000 100000 500000
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "Projecto_2" / "Projecto_final"))
+import userdb  # noqa: E402
+
+LEGACY_LOGINS = 3  # a versão antiga lê e reescreve o ficheiro inteiro a cada login
+
+
+def synthetic_users(n: int):
+    return {f"user{i:07d}": {"salt": "00" * 16, "hash": "ab" * 32, "failed_attempts": 0,
+                             "lockout_until": None, "last_failed": None} for i in range(n)}
+
+
+def legacy_login(path: Path, username: str) -> None:
+    with path.open("r", encoding="utf-8") as f:
+        users = json.load(f)
+    rec = users[username]
+    rec["failed_attempts"] += 1
+    rec["last_failed"] = "2025-11-02T13:07:46+00:00"
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(users, f, ensure_ascii=False, indent=2, sort_keys=True)
+    tmp.replace(path)
+
+
+def sqlite_login(path: Path, username: str) -> None:
+    rec = userdb.get_user(path, username)
+    userdb.update_user(path, username, {"failed_attempts": rec["failed_attempts"] + 1,
+                                        "last_failed": "2025-11-02T13:07:46+00:00"})
+
+
+def run(n: int, logins: int) -> None:
+    rnd = random.Random(n)
+    with tempfile.TemporaryDirectory() as d:
+        json_path, db_path = Path(d) / "users.json", Path(d) / "users.db"
+        with json_path.open("w", encoding="utf-8") as f:
+            json.dump(synthetic_users(n), f, indent=2, sort_keys=True)
+        t0 = time.perf_counter()
+        userdb.migrate_from_json(json_path, db_path)
+        t_migrate = time.perf_counter() - t0
+
+        names = [f"user{rnd.randrange(n):07d}" for _ in range(logins)]
+        t0 = time.perf_counter()
+        for u in names[:LEGACY_LOGINS]:
+            legacy_login(json_path, u)
+        t_old = (time.perf_counter() - t0) / LEGACY_LOGINS
+        t0 = time.perf_counter()
+        for u in names:
+            sqlite_login(db_path, u)
+        t_new = (time.perf_counter() - t0) / logins
+        assert userdb.get_user(db_path, names[0])["failed_attempts"] >= 1
+
+    print(f"{n:>9,} utilizadores: json {t_old * 1e3:9.2f} ms/login | sqlite {t_new * 1e3:6.3f} ms/login "
+          f"({t_old / t_new:,.0f}x) | migração {t_migrate:.2f}s")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark do armazenamento de utilizadores (JSON vs SQLite).")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 500_000])
+    p.add_argument("--logins", type=int, default=2000)
+    args = p.parse_args()
+    for n in args.sizes:
+        run(n, args.logins)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Benchmark da deteção por janelas: RuleEngine (por evento) vs shared/windows.py.
+
+Gera as falhas de um mês sintético: muitos IPs com falhas esporádicas, alguns
+IPs em força bruta contra um só utilizador e alguns a "espalhar" tentativas por
+vários utilizadores. Compara os disparos das duas versões (têm de ser iguais,
+incluindo a ordem dos IPs) e os tempos. Requer NumPy.
+
+    python benchmarks/bench_windows.py --fails 5000000 --days 30
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from shared.columns import np  # noqa: E402
+from shared.rules import DEFAULT_RULES, RuleEngine  # noqa: E402
+
+
+def synthetic_month(n: int, days: int, n_ips: int, seed: int):
+    rng = np.random.default_rng(seed)
+    span = days * 86400.0
+    t0 = 1_759_276_800.0
+    n_burst = n // 5
+    n_bg = n - n_burst
+    # fundo: IPs e utilizadores aleatórios ao longo do mês, timestamps ao segundo
+    ts = [t0 + np.floor(rng.random(n_bg) * span)]
+    ips = [rng.integers(0, n_ips, n_bg)]
+    users = [rng.integers(0, 10_000, n_bg)]
+    # rajadas: 1 falha/s durante 2 minutos, metade contra 1 utilizador, metade espalhadas
+    bursts = max(n_burst // 120, 1)
+    starts = t0 + np.floor(rng.random(bursts) * span)
+    ts.append((starts[:, None] + np.arange(120)).ravel())
+    ips.append(np.repeat(n_ips + rng.integers(0, 2_000, bursts), 120))
+    spread = np.repeat(rng.random(bursts) < 0.5, 120)
+    users.append(np.where(spread, rng.integers(0, 10_000, bursts * 120), np.repeat(rng.integers(0, 10_000, bursts), 120)))
+    return (np.concatenate(ips).astype(np.intc), np.concatenate(ts), np.concatenate(users).astype(np.intc))
+
+
+def engine_detect(ip, ts, user):
+    # Como Projecto_final/analyzer._detect_engine, mas sobre códigos
+    engine = RuleEngine(DEFAULT_RULES, fields=("user",))
+    order = np.argsort(ts, kind="stable")
+    last = {}
+    for k, t, u in zip(ip[order].tolist(), ts[order].tolist(), user[order].tolist()):
+        engine.feed(k, t, (u,))
+        last[k] = t
+    return {k: ([r["name"] for r in fired], last[k]) for k, fired in engine.fired_items()}
+
+
+def vector_detect(ip, ts, user):
+    from shared.windows import detect
+    return {k: ([r["name"] for r in fired], last) for k, (fired, last) in detect(ip, ts, DEFAULT_RULES, values=(user,)).items()}
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark da deteção por janelas (motor vs vetorizada).")
+    p.add_argument("--fails", type=int, default=5_000_000)
+    p.add_argument("--days", type=int, default=30)
+    p.add_argument("--ips", type=int, default=200_000)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+    if np is None:
+        sys.exit("NumPy não está instalado.")
+
+    cols = synthetic_month(args.fails, args.days, args.ips, args.seed)
+    n = len(cols[0])
+    results = {}
+    print(f"{'versão':<10} {'tempo(s)':>9} {'ns/falha':>9} {'IPs':>8}")
+    for name, fn in (("vetorizada", vector_detect), ("motor", engine_detect)):
+        t = time.perf_counter()
+        results[name] = fn(*cols)
+        dt = time.perf_counter() - t
+        print(f"{name:<10} {dt:>9.3f} {dt / n * 1e9:>9.0f} {len(results[name]):>8}")
+    assert list(results["motor"].items()) == list(results["vetorizada"].items()), "resultados diferentes!"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Módulos partilhados pelos projetos de autenticação e análise de logs."""
@@ -0,0 +1,129 @@
+"""Escrita em lote de linhas de log, com um thread de fundo.
+
+Abrir o CSV, escrever uma linha e fechá-lo a cada tentativa de login custa
+várias chamadas ao sistema por evento. `BufferedLog` põe as linhas numa fila
+em memória; um thread de fundo grava-as de uma vez quando a fila chega a
+`max_lines` ou quando a linha mais antiga já espera há `max_delay` segundos.
+O ficheiro fica aberto em O_APPEND e cada lote é um único os.write (os lotes
+de vários processos não se misturam a meio de uma linha); se o ficheiro for
+apagado ou trocado (rotação), é reaberto no lote seguinte. Cada lote é
+gravado com o lock exclusivo do log (shared/locking.py), partilhado com
+storage.log_line e com outros processos que escrevam no mesmo ficheiro.
+
+flush() grava o que estiver pendente e faz fsync: chama-se antes de ler o
+log no mesmo processo (p.ex. análise logo após o login). close() (registado
+com atexit) faz flush e termina o thread.
+
+    log = BufferedLog("logs.csv", header="timestamp,username,ip,result\\n")
+    log.write("2025-11-02 13:07:46+0000,alice,10.0.0.1,FAIL\\n")
+    log.flush()
+"""
+from __future__ import annotations
+import atexit
+import os
+import threading
+import time
+from typing import List, Optional
+from shared.locking import file_lock
+
+MAX_LINES = 1000
+MAX_DELAY = 0.2  # segundos
+
+
+class BufferedLog:
+    def __init__(self, path, header: str = "", max_lines: int = MAX_LINES, max_delay: float = MAX_DELAY):
+        self.path = os.fspath(path)
+        self.header = header
+        self.max_lines = max_lines
+        self.max_delay = max_delay
+        self._pending: List[str] = []
+        self._cond = threading.Condition()
+        self._io = threading.Lock()          # um lote de cada vez no ficheiro
+        self._fd: Optional[int] = None
+        self._ino: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._atexit = False
+
+    def write(self, text: str) -> None:
+        """Põe `text` (uma ou mais linhas completas, com o terminador) na fila."""
+        with self._cond:
+            self._pending.append(text)
+            if self._thread is None:
+                self._start()
+            if len(self._pending) >= self.max_lines:
+                self._cond.notify()
+
+    def flush(self) -> None:
+        """Grava já tudo o que está na fila e sincroniza o ficheiro com o disco."""
+        self._write_pending(sync=True)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+        self.flush()
+        with self._io:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    # ---------------- interno ----------------
+
+    def _start(self) -> None:
+        if not self._atexit:
+            atexit.register(self.close)
+            self._atexit = True
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="buffered-log", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return  # close() grava o resto
+                # Espera até o lote encher ou a linha mais antiga fazer max_delay
+                deadline = time.monotonic() + self.max_delay
+                while len(self._pending) < self.max_lines and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            self._write_pending(sync=False)
+
+    def _open(self) -> int:
+        try:
+            ino = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            ino = None
+        if self._fd is not None and ino == self._ino:
+            return self._fd
+        if self._fd is not None:
+            os.close(self._fd)
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._fd, self._ino = fd, os.fstat(fd).st_ino
+        return fd
+
+    def _write_pending(self, sync: bool) -> None:
+        with self._io:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            if not batch and not (sync and self._fd is not None):
+                return
+            with file_lock(self.path):
+                fd = self._open()
+                text = "".join(batch)
+                if self.header and os.fstat(fd).st_size == 0:
+                    text = self.header + text
+                data = memoryview(text.encode("utf-8"))
+                while data:
+                    data = data[os.write(fd, data):]
+                if sync:
+                    os.fsync(fd)
@@ -0,0 +1,194 @@
+"""Tabela de eventos em colunas compactas para análise de logs grandes.
+
+Em vez de uma lista de tuplos (datetime/float + 3 strings por linha, ~300
+bytes), cada evento ocupa 20 bytes: o timestamp num array('d') e o
+utilizador, o IP e o resultado como códigos inteiros array('i'). As strings
+são internadas uma única vez em `Interner` (código -> valor e valor -> código),
+por ordem da primeira ocorrência.
+
+    t = EventTable()
+    t.append(1761995408.0, "maria", "198.51.100.23", "FAIL")
+    fails = t.results.codes_where(lambda r: r == "FAIL")
+    per_ip = count_by(t.ip, t.result, fails)       # {código_ip: falhas}
+    {t.ips.values[k]: c for k, c in per_ip.items()}
+
+As agregações (count_by / distinct_by) usam NumPy (bincount + ordenação) se
+estiver instalado, com resultados iguais aos do caminho em Python puro,
+incluindo a ordem das chaves.
+"""
+from __future__ import annotations
+from array import array
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional
+    np = None
+
+USE_NUMPY = np is not None
+
+
+def numpy_enabled() -> bool:
+    return USE_NUMPY
+
+
+class Interner:
+    """Mapeia strings para códigos 0..n-1 (por ordem da primeira ocorrência)."""
+
+    __slots__ = ("values", "index")
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        c = self.index.get(value)
+        if c is None:
+            c = self.index[value] = len(self.values)
+            self.values.append(value)
+        return c
+
+    def codes_where(self, pred: Callable[[str], bool]) -> Set[int]:
+        return {c for c, v in enumerate(self.values) if pred(v)}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    # Ao enviar para outro processo basta a lista; o índice reconstrói-se em C
+    def __getstate__(self):
+        return self.values
+
+    def __setstate__(self, values: List[str]) -> None:
+        self.values = values
+        self.index = dict(zip(values, range(len(values))))
+
+
+class EventTable:
+    """Colunas ts / user / ip / result, com uma linha por evento do log."""
+
+    def __init__(self):
+        self.ts = array("d")
+        self.user = array("i")
+        self.ip = array("i")
+        self.result = array("i")
+        self.users = Interner()
+        self.ips = Interner()
+        self.results = Interner()
+
+    def append(self, ts: float, user: str, ip: str, result: str) -> None:
+        self.ts.append(ts)
+        self.user.append(self.users.code(user))
+        self.ip.append(self.ips.code(ip))
+        self.result.append(self.results.code(result))
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def extend(self, other: "EventTable") -> None:
+        """Acrescenta as linhas de outra tabela, traduzindo os seus códigos para os desta."""
+        self.ts.extend(other.ts)
+        for col, mine, their_col, theirs in ((self.user, self.users, other.user, other.users),
+                                             (self.ip, self.ips, other.ip, other.ips),
+                                             (self.result, self.results, other.result, other.results)):
+            remap = [mine.code(v) for v in theirs.values]
+            if USE_NUMPY and len(their_col):
+                col.frombytes(np.asarray(remap, dtype=np.intc)[_np_col(their_col)].tobytes())
+            else:
+                col.extend(array("i", map(remap.__getitem__, their_col)))
+
+    def rows(self) -> Iterator[Tuple[float, str, str, str]]:
+        users, ips, results = self.users.values, self.ips.values, self.results.values
+        for ts, u, ip, r in zip(self.ts, self.user, self.ip, self.result):
+            yield ts, users[u], ips[ip], results[r]
+
+    def select(self, codes: Set[int]) -> Iterator[Tuple[float, int, int]]:
+        """(ts, código_ip, código_user) das linhas cujo resultado está em `codes`, pela ordem da tabela."""
+        for ts, u, ip, r in zip(self.ts, self.user, self.ip, self.result):
+            if r in codes:
+                yield ts, ip, u
+
+    def nbytes(self) -> int:
+        # Memória das colunas (sem os dicionários de internamento)
+        return sum(a.itemsize * len(a) for a in (self.ts, self.user, self.ip, self.result))
+
+
+def count_by(keys: array, where: Optional[array] = None, codes: Optional[Set[int]] = None) -> Dict[int, int]:
+    """Contagem por código de `keys` (só linhas com where[i] em `codes`, se dado).
+
+    O dicionário fica pela ordem da primeira linha contada de cada chave,
+    como os defaultdict(int) das versões por linha (importa para desempates).
+    """
+    if USE_NUMPY:
+        return _np_count_by(keys, where, codes)
+    out: Dict[int, int] = {}
+    get = out.get
+    if where is None:
+        for k in keys:
+            out[k] = get(k, 0) + 1
+    else:
+        for k, w in zip(keys, where):
+            if w in codes:
+                out[k] = get(k, 0) + 1
+    return out
+
+
+def distinct_by(keys: array, values: array, where: array, codes: Set[int]) -> Dict[int, int]:
+    """Nº de valores distintos por chave (só linhas com where[i] em `codes`), pela ordem da 1.ª linha."""
+    if USE_NUMPY:
+        return _np_distinct_by(keys, values, where, codes)
+    seen: Dict[int, Set[int]] = {}
+    for k, v, w in zip(keys, values, where):
+        if w in codes:
+            s = seen.get(k)
+            if s is None:
+                s = seen[k] = set()
+            s.add(v)
+    return {k: len(s) for k, s in seen.items()}
+
+
+# --------------------- Caminho NumPy ---------------------
+
+def _np_col(a: array):
+    # Vista sem cópia sobre o buffer do array ('i' -> int32, 'b' -> int8, ...)
+    return np.frombuffer(a, dtype=a.typecode) if len(a) else np.zeros(0, dtype=a.typecode)
+
+
+def _np_mask(where: array, codes: Set[int]):
+    w = _np_col(where)
+    lut = np.zeros(max(int(w.max()) if len(w) else 0, max(codes, default=0)) + 1, dtype=bool)
+    lut[[c for c in codes if c >= 0]] = True
+    return lut[w]
+
+
+def _np_first_seen_order(k, n_keys: int):
+    # Chaves presentes em k, pela ordem da primeira ocorrência
+    first = np.full(n_keys, len(k), dtype=np.int64)
+    np.minimum.at(first, k, np.arange(len(k), dtype=np.int64))
+    present = np.flatnonzero(first < len(k))
+    return present[np.argsort(first[present], kind="stable")]
+
+
+def _np_count_by(keys: array, where: Optional[array], codes: Optional[Set[int]]) -> Dict[int, int]:
+    k = _np_col(keys)
+    if where is not None:
+        k = k[_np_mask(where, codes)]
+    if not len(k):
+        return {}
+    counts = np.bincount(k)
+    order = _np_first_seen_order(k, len(counts))
+    return dict(zip(order.tolist(), counts[order].tolist()))
+
+
+def _np_distinct_by(keys: array, values: array, where: array, codes: Set[int]) -> Dict[int, int]:
+    m = _np_mask(where, codes)
+    k, v = _np_col(keys)[m], _np_col(values)[m]
+    if not len(k):
+        return {}
+    # Pares (chave, valor) codificados num int64; ordenar e tirar repetidos
+    nv = int(v.max()) + 1
+    pairs = k.astype(np.int64) * nv + v
+    pairs.sort()
+    uniq = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+    counts = np.bincount(uniq // nv)
+    order = _np_first_seen_order(k, len(counts))
+    return dict(zip(order.tolist(), counts[order].tolist()))
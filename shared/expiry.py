@@ -0,0 +1,80 @@
+"""Expiração dos bloqueios temporários da blacklist.
+
+`ExpiryHeap` mantém as chaves ordenadas por instante de expiração (min-heap
+sobre `until`, em epoch). Atualizar ou retirar uma chave não mexe no heap: a
+entrada antiga fica lá e é ignorada quando chega ao topo (remoção preguiçosa).
+Obter as chaves expiradas custa O(k log n) para k expiradas, sem percorrer
+a blacklist toda.
+
+`purge_expired` retira de uma blacklist (dict) todas as entradas expiradas de
+uma só vez, para serem gravadas numa única escrita por quem a chama. As
+consultas (is_ip_blocked) limitam-se a ignorar entradas expiradas.
+"""
+from __future__ import annotations
+import heapq
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class ExpiryHeap:
+    def __init__(self):
+        self._heap: List[Tuple[float, str]] = []
+        self._until: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._until)
+
+    def push(self, key: str, until: float) -> None:
+        """Regista (ou atualiza) a expiração de `key`."""
+        self._until[key] = until
+        heapq.heappush(self._heap, (until, key))
+        if len(self._heap) > 2 * len(self._until) + 64:
+            self._compact()
+
+    def discard(self, key: str) -> None:
+        self._until.pop(key, None)
+
+    def _drop_stale(self) -> None:
+        heap, until = self._heap, self._until
+        while heap and until.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+
+    def _compact(self) -> None:
+        self._heap = [(u, k) for k, u in self._until.items()]
+        heapq.heapify(self._heap)
+
+    def next_expiry(self) -> Optional[float]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_expired(self, now: float) -> List[str]:
+        """Retira e devolve as chaves com until <= now, da mais antiga para a mais recente."""
+        out = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return out
+            _until, key = heapq.heappop(self._heap)
+            del self._until[key]
+            out.append(key)
+
+    @classmethod
+    def from_blacklist(cls, black: Dict[str, Any], until_of: Callable[[Any], Optional[float]]) -> "ExpiryHeap":
+        h = cls()
+        for key, rec in black.items():
+            u = until_of(rec)
+            if u is not None:
+                h._until[key] = u
+        h._compact()
+        return h
+
+
+def purge_expired(black: Dict[str, Any], until_of: Callable[[Any], Optional[float]], now: float) -> List[str]:
+    """Retira de `black` as entradas com until_of(rec) <= now; devolve as chaves retiradas.
+
+    until_of devolve None para entradas que não expiram (permanentes ou sem
+    data válida), que nunca são retiradas.
+    """
+    expired = ExpiryHeap.from_blacklist(black, until_of).pop_expired(now)
+    for key in expired:
+        del black[key]
+    return expired
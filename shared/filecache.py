@@ -0,0 +1,75 @@
+"""Cache por processo do conteúdo de ficheiros JSON lidos com frequência.
+
+O ficheiro só é lido de novo quando a sua assinatura (mtime em ns, tamanho,
+inode) muda, pelo que cada consulta custa um os.stat() em vez de um json.load
+do ficheiro inteiro. Isto cobre tanto reescritas no lugar (Projecto/analytics)
+como substituições atómicas via ficheiro temporário (Projecto_final/storage).
+
+O objeto devolvido é partilhado: é só para leitura. Para alterar, ler o
+ficheiro diretamente, modificar a cópia e gravar.
+
+    black = cached_json("blacklist.json", {})
+    rec = black.get(ip)        # O(1)
+"""
+from __future__ import annotations
+import json
+import os
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+class FileCache:
+    """Resultado de `load(path)`, recalculado só quando o ficheiro (ou um de `extra`) muda."""
+
+    def __init__(self, path: str, load: Callable[[str], Any], default: Any = None, extra: Sequence[str] = ()):
+        self.path = path
+        self.paths = (path, *extra)
+        self.load = load
+        self.default = default
+        self._sig: Optional[tuple] = None
+        self._value: Any = default
+
+    def _signature(self) -> tuple:
+        return tuple(file_signature(p) for p in self.paths)
+
+    def get(self) -> Any:
+        sig = self._signature()
+        if not any(sig):
+            self._sig, self._value = None, self.default
+        elif sig != self._sig:
+            self._value = self.load(self.path)
+            # Se algum ficheiro mudou durante a leitura, a próxima consulta volta a lê-lo
+            self._sig = sig if self._signature() == sig else None
+        return self._value
+
+    def invalidate(self) -> None:
+        self._sig = None
+
+
+def _load_json(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+_caches: Dict[tuple, FileCache] = {}
+
+
+def cached_json(path, default: Any = None, load: Callable[[str], Any] = _load_json, extra: Sequence[str] = ()) -> Any:
+    """Conteúdo JSON de `path` (ou `default` se não existir), através de um FileCache por caminho.
+
+    extra: outros ficheiros lidos por `load` (p.ex. o journal da blacklist)
+    cuja alteração também invalida a cache.
+    """
+    extra = tuple(os.path.abspath(os.fspath(p)) for p in extra)
+    key = (os.path.abspath(os.fspath(path)), load, extra)
+    cache = _caches.get(key)
+    if cache is None:
+        cache = _caches[key] = FileCache(key[0], load, default, extra)
+    return cache.get()
@@ -0,0 +1,134 @@
+"""Índice da blacklist com entradas por IP exato e por prefixo CIDR (IPv4/IPv6).
+
+As chaves da blacklist podem ser IPs ("203.0.113.5") ou redes
+("203.0.113.0/24", "2001:db8::/32"). Os IPs exatos ficam num dicionário (O(1));
+as redes ficam numa trie binária por versão de IP, percorrida bit a bit a
+partir do bit mais significativo, pelo que uma consulta custa no máximo
+O(comprimento do prefixo) passos (32 em IPv4, 128 em IPv6) e só desce enquanto
+houver redes nesse caminho.
+
+    idx = BlacklistIndex({"203.0.113.0/24": {"type": "perm"}})
+    idx.matches("203.0.113.7")   # [("203.0.113.0/24", {"type": "perm"})]
+
+matches() devolve todas as entradas que cobrem o IP, da mais específica para
+a menos específica (a primeira é a de maior prefixo): quem consulta decide,
+p.ex., ignorar uma entrada temporária expirada e passar à rede que a contém.
+"""
+from __future__ import annotations
+import ipaddress
+import socket
+from typing import Any, Dict, List, Optional, Tuple
+from shared.filecache import cached_json
+from shared.journal import journal_path, read_blacklist
+
+Match = Tuple[str, Any]
+
+_BITS = {4: 32, 6: 128}
+
+
+class PrefixTrie:
+    """Trie binária de prefixos de uma versão de IP; nós são listas [filho0, filho1, valores]."""
+
+    __slots__ = ("bits", "root", "size")
+
+    def __init__(self, bits: int):
+        self.bits = bits
+        self.root: list = [None, None, None]
+        self.size = 0
+
+    def insert(self, addr: int, prefixlen: int, value: Any) -> None:
+        node = self.root
+        for i in range(prefixlen):
+            b = (addr >> (self.bits - 1 - i)) & 1
+            if node[b] is None:
+                node[b] = [None, None, None]
+            node = node[b]
+        # Várias chaves podem dar a mesma rede ("10.0.0.0/8" e "10.1.2.3/8")
+        if node[2] is None:
+            node[2] = []
+        node[2].append(value)
+        self.size += 1
+
+    def matches(self, addr: int) -> List[Any]:
+        """Valores dos prefixos que contêm `addr`, do mais longo para o mais curto."""
+        found = []
+        node = self.root
+        shift = self.bits - 1
+        while node is not None:
+            if node[2] is not None:
+                found.append(node[2])
+            if shift < 0:
+                break
+            node = node[(addr >> shift) & 1]
+            shift -= 1
+        return [v for values in reversed(found) for v in values]
+
+    def longest_match(self, addr: int) -> Optional[Any]:
+        found = self.matches(addr)
+        return found[0] if found else None
+
+
+class BlacklistIndex:
+    """Blacklist {chave: registo} indexada por IP exato e por prefixo CIDR."""
+
+    def __init__(self, black: Optional[Dict[str, Any]] = None):
+        self.exact: Dict[str, Any] = {}
+        self.tries = {v: PrefixTrie(bits) for v, bits in _BITS.items()}
+        for key, rec in (black or {}).items():
+            self.add(key, rec)
+
+    def add(self, key: str, rec: Any) -> None:
+        if "/" not in key:
+            self.exact[key] = rec
+            return
+        try:
+            net = ipaddress.ip_network(key, strict=False)
+        except ValueError:
+            self.exact[key] = rec  # chave inválida como rede: só coincide com a string exata
+            return
+        self.tries[net.version].insert(int(net.network_address), net.prefixlen, (key, rec))
+
+    def __len__(self) -> int:
+        return len(self.exact) + sum(t.size for t in self.tries.values())
+
+    def matches(self, ip: str) -> List[Match]:
+        """(chave, registo) das entradas que cobrem `ip`, da mais específica para a menos específica."""
+        out: List[Match] = []
+        rec = self.exact.get(ip)
+        if rec is not None:
+            out.append((ip, rec))
+        if not (self.tries[4].size or self.tries[6].size):
+            return out
+        parsed = _parse_ip(ip)
+        if parsed is not None:
+            out.extend(self.tries[parsed[0]].matches(parsed[1]))
+        return out
+
+    def lookup(self, ip: str) -> Optional[Match]:
+        """Entrada mais específica que cobre `ip` (longest prefix match), ou None."""
+        found = self.matches(ip)
+        return found[0] if found else None
+
+
+def _parse_ip(ip: str) -> Optional[Tuple[int, int]]:
+    # (versão, endereço como inteiro); inet_pton é muito mais rápido do que ipaddress
+    for version, family in ((4, socket.AF_INET), (6, socket.AF_INET6)):
+        try:
+            return version, int.from_bytes(socket.inet_pton(family, ip), "big")
+        except (OSError, ValueError):
+            pass
+    try:
+        addr = ipaddress.ip_address(ip)  # p.ex. IPv6 com zona ("fe80::1%eth0")
+    except ValueError:
+        return None
+    return addr.version, int(addr)
+
+
+def load_blacklist_index(path: str) -> BlacklistIndex:
+    # Snapshot + journal (shared/journal.py), indexados
+    return BlacklistIndex(read_blacklist(path))
+
+
+def cached_blacklist_index(path) -> BlacklistIndex:
+    """Índice da blacklist em cache no processo; relido só quando o snapshot ou o journal mudam."""
+    return cached_json(path, BlacklistIndex(), load=load_blacklist_index, extra=(journal_path(path),))
@@ -0,0 +1,189 @@
+"""Blacklist em snapshot JSON + journal append-only (JSONL).
+
+Gravar a blacklist inteira (indent=2) por cada IP alterado custa O(tamanho
+da blacklist). Aqui cada alteração acrescenta uma linha ao journal, ao lado
+do snapshot (blacklist.json -> blacklist.journal.jsonl):
+
+    {"op": "add", "key": "203.0.113.5", "entry": {...}}
+    {"op": "upgrade", "key": "203.0.113.5", "entry": {...}}
+    {"op": "expire", "key": "203.0.113.5"}
+
+A leitura carrega o snapshot e reaplica o journal por ordem (a ordem das
+chaves fica igual à do dicionário em memória). Quando o journal passa a ter
+mais registos do que a blacklist tem entradas (e pelo menos COMPACT_MIN),
+é dobrado num snapshot novo (escrita atómica) e esvaziado; assim o custo por
+alteração fica O(1) amortizado. As operações são idempotentes: se o processo
+morrer entre a troca do snapshot e o esvaziar do journal, reaplicá-lo sobre o
+snapshot novo dá o mesmo resultado. Uma última linha incompleta (escrita
+interrompida) é ignorada.
+
+    bl = read_blacklist("blacklist.json")      # JournaledBlacklist (um dict)
+    bl["198.51.100.7"] = {"type": "perm"}
+    del bl["203.0.113.5"]
+    save_blacklist(bl, "blacklist.json", write_snapshot)   # 2 linhas no journal
+
+Só as atribuições/remoções de chaves são registadas: entradas alteradas no
+lugar (bl[k]["x"] = ...) têm de ser reatribuídas.
+
+Vários processos podem gravar ao mesmo tempo: as escritas e a compactação
+correm com o lock exclusivo do snapshot (shared/locking.py) e a compactação
+relê snapshot + journal dentro do lock, pelo que não perde registos
+acrescentados por outros processos; a leitura usa o lock partilhado.
+"""
+from __future__ import annotations
+import json
+import os
+from typing import Any, Callable, Dict, List
+from shared.locking import file_lock
+
+COMPACT_MIN = 1000
+
+_MISSING = object()
+
+
+def journal_path(path) -> str:
+    """Caminho do journal de um snapshot: "dir/blacklist.json" -> "dir/blacklist.journal.jsonl"."""
+    root, _ext = os.path.splitext(os.fspath(path))
+    return root + ".journal.jsonl"
+
+
+class JournaledBlacklist(dict):
+    """dict que regista as chaves atribuídas/removidas desde a leitura (ou última gravação)."""
+
+    def __init__(self, data=(), records: int = 0):
+        super().__init__(data)
+        self.records = records               # registos já no journal
+        self._orig: Dict[str, Any] = {}      # chave -> valor antes da 1.ª alteração
+        self._added: Dict[str, None] = {}    # chaves (re)inseridas no fim, por ordem
+
+    def _touch(self, key) -> None:
+        if key not in self._orig:
+            self._orig[key] = dict.get(self, key, _MISSING)
+
+    def __setitem__(self, key, value) -> None:
+        self._touch(key)
+        if key not in self:
+            self._added[key] = None
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key) -> None:
+        self._touch(key)
+        self._added.pop(key, None)
+        super().__delitem__(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            self._touch(key)
+            self._added.pop(key, None)
+        return super().pop(key, *default)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def changes(self) -> List[Dict[str, Any]]:
+        """Registos do journal para as alterações pendentes (sem as que se anulam).
+
+        Reaplicados por ordem (expire, upgrade no lugar, add no fim), deixam as
+        chaves pela mesma ordem que este dicionário.
+        """
+        expire, upgrade = [], []
+        for key, old in self._orig.items():
+            if old is _MISSING:
+                continue
+            if key in self._added or key not in self:
+                expire.append({"op": "expire", "key": key})
+            elif self[key] != old:
+                upgrade.append({"op": "upgrade", "key": key, "entry": self[key]})
+        add = [{"op": "add", "key": key, "entry": self[key]} for key in self._added]
+        return expire + upgrade + add
+
+    def mark_clean(self) -> None:
+        self._orig.clear()
+        self._added.clear()
+
+
+def _apply(black: Dict[str, Any], rec: Dict[str, Any]) -> None:
+    if rec["op"] == "expire":
+        black.pop(rec["key"], None)
+    else:
+        black[rec["key"]] = rec["entry"]
+
+
+def read_blacklist(path) -> JournaledBlacklist:
+    """Snapshot (se existir) + journal reaplicado por ordem."""
+    with file_lock(path, shared=True):
+        return _read(path)
+
+
+def _read(path) -> JournaledBlacklist:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            black = json.load(f)
+    except FileNotFoundError:
+        black = {}
+    records = 0
+    try:
+        with open(journal_path(path), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # linha truncada por uma escrita interrompida
+                _apply(black, rec)
+                records += 1
+    except FileNotFoundError:
+        pass
+    return JournaledBlacklist(black, records)
+
+
+def append_records(path, records: List[Dict[str, Any]]) -> None:
+    """Acrescenta registos ao journal de `path` numa única escrita."""
+    if not records:
+        return
+    data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+    with file_lock(path):
+        with open(journal_path(path), "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def compact(black: Dict[str, Any], path, write_snapshot: Callable[[Dict[str, Any]], None]) -> None:
+    """Grava `black` como snapshot (write_snapshot deve ser atómico) e esvazia o journal."""
+    with file_lock(path):
+        write_snapshot(dict(black))
+        try:
+            os.remove(journal_path(path))
+        except FileNotFoundError:
+            pass
+    if isinstance(black, JournaledBlacklist):
+        black.records = 0
+        black.mark_clean()
+
+
+def save_blacklist(black: Dict[str, Any], path, write_snapshot: Callable[[Dict[str, Any]], None]) -> int:
+    """Grava as alterações de `black`; devolve o nº de registos acrescentados ao journal.
+
+    Um dict simples (sem histórico de alterações) é gravado inteiro como
+    snapshot. Depois de acrescentar, compacta se o journal já tiver mais
+    registos do que max(COMPACT_MIN, len(black)).
+    """
+    if not isinstance(black, JournaledBlacklist):
+        compact(black, path, write_snapshot)
+        return 0
+    records = black.changes()
+    with file_lock(path):
+        append_records(path, records)
+        black.records += len(records)
+        black.mark_clean()
+        if black.records > max(COMPACT_MIN, len(black)):
+            # Estado atual do disco (inclui o que outros processos acrescentaram)
+            compact(_read(path), path, write_snapshot)
+            black.records = 0
+    return len(records)
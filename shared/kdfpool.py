@@ -0,0 +1,120 @@
+"""Verificação de passwords (PBKDF2) num pool de threads, com API asyncio.
+
+hashlib.pbkdf2_hmac liberta o GIL durante o cálculo, por isso várias
+verificações em threads diferentes correm em paralelo em núcleos diferentes.
+`KdfPool` limita o nº de threads (por omissão, um por núcleo) e o nº de
+pedidos pendentes (fila + em curso): acima do limite, quem submete espera
+(submit bloqueia; run faz await) em vez de acumular trabalho sem fim. Em run,
+a espera por vaga é um future no próprio event loop, acordado quando uma vaga
+é libertada: nenhum thread fica parado à espera.
+
+    ok = await verify("segredo", salt, esperado, 200_000)      # default_pool()
+    ok = await default_pool().run(auth.verify_password, pwd, salt_b64, hash_b64)
+    fut = default_pool().submit(fn, *args)                     # concurrent.futures.Future
+"""
+from __future__ import annotations
+import asyncio
+import hashlib
+import hmac
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+def pbkdf2_verify(password: str, salt: bytes, expected: bytes, iterations: int,
+                  dklen: Optional[int] = None, hash_name: str = "sha256") -> bool:
+    dk = hashlib.pbkdf2_hmac(hash_name, password.encode("utf-8"), salt, iterations, dklen)
+    return hmac.compare_digest(dk, expected)
+
+
+class KdfPool:
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.workers
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="kdf")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()    # vagas + fila de espera do run
+        self._waiters: deque = deque()   # (loop, future) à espera de vaga, por ordem
+
+    def _release(self) -> None:
+        with self._lock:
+            self._slots.release()
+            self._wake_one()
+
+    def _wake_one(self) -> None:
+        # Com o _lock: acorda o 1.º run à espera (que volta a tentar a vaga)
+        while self._waiters:
+            loop, fut = self._waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_set_waiter, fut)
+                return
+            except RuntimeError:  # loop já fechado: passa ao seguinte
+                continue
+
+    def _submit(self, fn: Callable[..., Any], *args) -> Future:
+        # Com uma vaga já reservada; a vaga é libertada quando o trabalho acaba
+        try:
+            fut = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        fut.add_done_callback(lambda _f: self._release())
+        return fut
+
+    def submit(self, fn: Callable[..., Any], *args) -> Future:
+        """Agenda fn(*args); bloqueia enquanto houver max_pending pedidos pendentes."""
+        self._slots.acquire()
+        return self._submit(fn, *args)
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Como submit, mas para asyncio: espera por vaga e pelo resultado sem bloquear o loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._slots.acquire(blocking=False):
+                    break
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    try:
+                        self._waiters.remove((loop, waiter))
+                    except ValueError:
+                        self._wake_one()  # já tinha sido acordado: a vez passa ao seguinte
+                raise
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    async def verify(self, password: str, salt: bytes, expected: bytes, iterations: int,
+                     dklen: Optional[int] = None, hash_name: str = "sha256") -> bool:
+        return await self.run(pbkdf2_verify, password, salt, expected, iterations, dklen, hash_name)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+def _set_waiter(fut: asyncio.Future) -> None:
+    if not fut.done():  # cancelado entretanto
+        fut.set_result(None)
+
+
+_default: Optional[KdfPool] = None
+_default_lock = threading.Lock()
+
+
+def default_pool() -> KdfPool:
+    """Pool partilhado pelo processo (criado na 1.ª utilização, um thread por núcleo)."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = KdfPool()
+        return _default
+
+
+async def verify(password: str, salt: bytes, expected: bytes, iterations: int,
+                 dklen: Optional[int] = None, hash_name: str = "sha256") -> bool:
+    """PBKDF2 + comparação em tempo constante, no pool partilhado."""
+    return await default_pool().verify(password, salt, expected, iterations, dklen, hash_name)
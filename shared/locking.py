@@ -0,0 +1,85 @@
+"""Locks de ficheiro (fcntl.flock) para vários processos sobre os mesmos ficheiros.
+
+A escrita tmp + replace impede leituras a meio, mas dois processos que leem,
+alteram e gravam o mesmo JSON ao mesmo tempo perdem a alteração de um deles.
+`file_lock(path)` serializa-os com um lock consultivo num ficheiro ao lado
+("users.json" -> "users.json.lock"): o próprio ficheiro de dados é trocado
+pelo replace, o de lock nunca muda. `json_transaction` junta o lock, a
+leitura e a gravação:
+
+    with json_transaction("users.json") as users:
+        users["alice"]["created_at"] = 0     # gravado (tmp + replace) à saída
+
+Os locks são reentrantes no mesmo thread (um file_lock dentro de outro sobre
+o mesmo ficheiro não bloqueia). Um lock partilhado (shared=True) deixa vários
+leitores entrar ao mesmo tempo, mas não escritores. Sem fcntl (Windows), os
+locks não fazem nada e fica o comportamento anterior.
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem locks consultivos
+    fcntl = None
+
+_held = threading.local()
+
+
+def lock_path(path) -> str:
+    return os.fspath(path) + ".lock"
+
+
+@contextmanager
+def file_lock(path, shared: bool = False) -> Iterator[None]:
+    """Lock consultivo (exclusivo, ou partilhado) associado a `path`."""
+    key = os.path.abspath(lock_path(path))
+    held: Dict[str, int] = _held.__dict__.setdefault("locks", {})
+    if fcntl is None or key in held:
+        held[key] = held.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            held[key] -= 1
+            if not held[key]:
+                del held[key]
+        return
+    fd = os.open(key, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        held[key] = 1
+        try:
+            yield
+        finally:
+            del held[key]
+    finally:
+        os.close(fd)  # fechar liberta o lock
+
+
+def write_json_atomic(path, data: Any) -> None:
+    tmp = f"{os.fspath(path)}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+@contextmanager
+def json_transaction(path, default: Callable[[], Any] = dict,
+                     write: Optional[Callable[[Any, Any], None]] = None) -> Iterator[Any]:
+    """Lê `path` com o lock exclusivo, entrega os dados e grava-os se o bloco terminar sem erro.
+
+    default: fábrica para quando o ficheiro não existe; write(path, data)
+    substitui a gravação (por omissão tmp + replace, indent=2).
+    """
+    with file_lock(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = default()
+        yield data
+        (write or write_json_atomic)(path, data)
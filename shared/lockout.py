@@ -0,0 +1,173 @@
+"""Estado de lockout (falhas consecutivas e tempos) num ficheiro binário de slots fixos.
+
+Os contadores de falhas mudam a cada tentativa falhada; guardá-los junto das
+credenciais (salt/hash) obriga a reescrever o ficheiro de utilizadores a cada
+falha. Aqui cada utilizador ocupa um slot de 36 bytes numa tabela de hash em
+disco (endereçamento aberto, sondagem linear), pelo que ler ou gravar o estado
+de um utilizador custa um pread/pwrite, sem ler nem reescrever o resto:
+
+    cabeçalho  MAGIC(8) | slots(uint32) | usados(uint32)
+    slot       blake2b(chave, 16 bytes) | count(uint32) | t1(double) | t2(double)
+
+O significado de count/t1/t2 é de quem usa (p.ex. falhas, bloqueado até,
+última falha); tempos em epoch, com 0.0 para "sem valor". Quando a tabela
+passa a metade da ocupação é reconstruída com o dobro dos slots (noutro
+ficheiro, trocado de forma atómica); os outros processos reabrem o ficheiro
+quando o inode muda. As gravações correm com o lock exclusivo do ficheiro
+(shared/locking.py): dois processos não ocupam o mesmo slot vazio nem
+reconstroem a tabela ao mesmo tempo. Um contador que depende do valor atual
+(falhas + 1) deve ser alterado com update, que lê e grava sob o mesmo lock;
+get seguido de put perde as falhas de outro processo pelo meio.
+
+    lk = LockoutFile("lockout.bin")
+    lk.put("alice", 3, time.time() + 60, time.time())
+    lk.get("alice")      # (3, 1762000060.0, 1762000000.0); None se nunca gravado
+    lk.update("alice", lambda st: (st[0] + 1, st[1], time.time()) if st else (1, 0.0, time.time()))
+"""
+from __future__ import annotations
+import hashlib
+import os
+import struct
+import threading
+from typing import Callable, Optional, Tuple
+from shared.locking import file_lock
+
+MAGIC = b"LOCKOUT1"
+HEADER = struct.Struct("<8sII")
+SLOT = struct.Struct("<16sIdd")
+INITIAL_SLOTS = 1024
+_EMPTY = bytes(16)
+_PROBE = 8  # slots lidos por pread durante a sondagem
+
+State = Tuple[int, float, float]
+
+
+def _digest(key: str) -> bytes:
+    d = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    return d if d != _EMPTY else b"\x01" + d[1:]  # o digest nulo marca slots vazios
+
+
+class LockoutFile:
+    def __init__(self, path, initial_slots: int = INITIAL_SLOTS):
+        self.path = os.fspath(path)
+        self.initial_slots = initial_slots
+        self._fd: Optional[int] = None
+        self._ino: Optional[int] = None
+        self.slots = 0
+        self.used = 0
+        self._mutex = threading.RLock()  # o fd é partilhado pelos threads do processo
+
+    # ---------------- ficheiro ----------------
+
+    def _open(self) -> None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            st = None
+        if self._fd is not None and st is not None and st.st_ino == self._ino:
+            self.slots, self.used = self._header()
+            return
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if st is None:
+            self._create(self.path, self.initial_slots, ())
+        fd = os.open(self.path, os.O_RDWR)
+        self._fd, self._ino = fd, os.fstat(fd).st_ino
+        self.slots, self.used = self._header()
+
+    def _header(self) -> Tuple[int, int]:
+        magic, slots, used = HEADER.unpack(os.pread(self._fd, HEADER.size, 0))
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: não é um ficheiro de lockout")
+        return slots, used
+
+    @staticmethod
+    def _create(path: str, slots: int, entries) -> None:
+        # Tabela nova (escrita atómica) com as entradas (digest, count, t1, t2)
+        table = bytearray(HEADER.size + slots * SLOT.size)
+        used = 0
+        for digest, count, t1, t2 in entries:
+            i = int.from_bytes(digest[:8], "little") % slots
+            while table[HEADER.size + i * SLOT.size:HEADER.size + i * SLOT.size + 16] != _EMPTY:
+                i = (i + 1) % slots
+            SLOT.pack_into(table, HEADER.size + i * SLOT.size, digest, count, t1, t2)
+            used += 1
+        HEADER.pack_into(table, 0, MAGIC, slots, used)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(table)
+        os.replace(tmp, path)
+
+    def _find(self, digest: bytes) -> Tuple[int, bool]:
+        # (slot, encontrado): o slot da chave ou o 1.º vazio onde ela entraria
+        i = int.from_bytes(digest[:8], "little") % self.slots
+        while True:
+            n = min(_PROBE, self.slots - i)
+            buf = os.pread(self._fd, n * SLOT.size, HEADER.size + i * SLOT.size)
+            for j in range(n):
+                d = buf[j * SLOT.size:j * SLOT.size + 16]
+                if d == digest:
+                    return i + j, True
+                if d == _EMPTY:
+                    return i + j, False
+            i = (i + n) % self.slots
+
+    def _read(self, slot: int) -> State:
+        _d, count, t1, t2 = SLOT.unpack(os.pread(self._fd, SLOT.size, HEADER.size + slot * SLOT.size))
+        return count, t1, t2
+
+    def _grow(self) -> None:
+        data = os.pread(self._fd, self.slots * SLOT.size, HEADER.size)
+        entries = [e for e in SLOT.iter_unpack(data) if e[0] != _EMPTY]
+        self._create(self.path, self.slots * 2, entries)
+        self._open()
+
+    # ---------------- API ----------------
+
+    def get(self, key: str) -> Optional[State]:
+        if not os.path.exists(self.path):
+            return None
+        with self._mutex:
+            self._open()
+            slot, found = self._find(_digest(key))
+            if not found:
+                return None
+            return self._read(slot)
+
+    def put(self, key: str, count: int, t1: float = 0.0, t2: float = 0.0) -> None:
+        self.update(key, lambda _st: (count, t1, t2))
+
+    def update(self, key: str, fn: Callable[[Optional[State]], Optional[State]]) -> Optional[State]:
+        """Lê, altera e grava o estado de `key` sob o lock exclusivo; devolve o estado final.
+
+        fn recebe o estado atual (None se nunca gravado) e devolve o novo, ou
+        None para o deixar como está.
+        """
+        with self._mutex, file_lock(self.path):
+            self._open()
+            digest = _digest(key)
+            slot, found = self._find(digest)
+            cur = self._read(slot) if found else None
+            new = fn(cur)
+            if new is None:
+                return cur
+            if not found and 2 * (self.used + 1) > self.slots:
+                self._grow()
+                slot, found = self._find(digest)
+            os.pwrite(self._fd, SLOT.pack(digest, *new), HEADER.size + slot * SLOT.size)
+            if not found:
+                self.used += 1
+                os.pwrite(self._fd, HEADER.pack(MAGIC, self.slots, self.used), 0)
+            return tuple(new)
+
+    def ensure(self) -> None:
+        """Cria o ficheiro (tabela vazia) se ainda não existir."""
+        with self._mutex, file_lock(self.path):
+            self._open()
+
+    def close(self) -> None:
+        with self._mutex:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
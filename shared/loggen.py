@@ -0,0 +1,298 @@
+"""Gerador de logs sintéticos em streaming, com perfis de cenário, para testes de carga.
+
+Cada componente de tráfego é um gerador infinito de eventos (epoch, user, ip,
+resultado) por ordem temporal; `generate` junta-os com heapq.merge, pelo que
+as linhas saem já ordenadas sem nunca guardar o log em memória (100M linhas
+gastam o mesmo que 100). Com a mesma semente, o resultado é sempre igual.
+
+Componentes (a taxa de cada um é uma fração de `rate`, em eventos por segundo
+de tempo do log):
+    diurnal   utilizadores legítimos, com ciclo diário (pico às 15h UTC), ~5% de enganos
+    bursts    rajadas de 12 falhas em ~4 min de um IP       -> short_bruteforce
+    slowlow   atacantes lentos, ~40 falhas/24h cada, espaçadas -> long_bruteforce
+    spray     um IP a tentar 8 utilizadores diferentes em ~6 min -> scattered_users
+
+Esquemas (nomes dos campos, formato do timestamp e dos resultados):
+    projecto    timestamp,username,ip,result   2025-10-31T15:20:05.481371   success/fail_bad_pwd/fail_no_user
+    final       timestamp,username,ip,result   2025-11-01 11:10:08+0000     SUCCESS/FAIL
+    analisador  timestamp,ip,user,status       2025-10-30T08:00:00Z         success/fail
+
+Formatos: os que analisador_logs/io_utils.read_lines_auto aceita (csv, json
+em array, jsonl e pipe); por omissão, o da extensão do ficheiro.
+
+    python -m shared.loggen -o big.csv --rows 100000000 --profile mixed --rate 2000 --seed 7
+    python -m shared.loggen -o live.csv --schema final --throttle 500   # escreve em tempo real
+"""
+from __future__ import annotations
+import argparse
+import heapq
+import math
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import islice, takewhile
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+Event = Tuple[float, str, str, str]  # (epoch, user, ip, "success"|"fail_bad_pwd"|"fail_no_user")
+
+PROFILES: Dict[str, Dict[str, float]] = {
+    "diurnal": {"diurnal": 1.0},
+    "bursts": {"diurnal": 0.9, "bursts": 0.1},
+    "slowlow": {"diurnal": 0.95, "slowlow": 0.05},
+    "spray": {"diurnal": 0.9, "spray": 0.1},
+    "mixed": {"diurnal": 0.85, "bursts": 0.05, "slowlow": 0.05, "spray": 0.05},
+}
+DEFAULT_START = "2025-11-01T00:00:00+00:00"
+BATCH = 10_000  # linhas por escrita
+
+BURST_SIZE, BURST_GAP = 12, (10.0, 24.0)    # 12 falhas, 11 intervalos <= 264 s
+SPRAY_SIZE, SPRAY_GAP = 8, (30.0, 60.0)     # 8 utilizadores, 7 intervalos <= 420 s
+SLOWLOW_PER_DAY = 40
+SPRAY_NAMES = ("admin", "root", "test", "guest", "oracle", "support", "backup", "info")
+
+
+def user_name(i: int) -> str:
+    return f"user{i}"
+
+
+def _ip(a: int, b: int, k: int) -> str:
+    return f"{a}.{b + (k >> 16 & 15)}.{k >> 8 & 255}.{k & 255}"
+
+
+# ---------------- componentes ----------------
+
+def diurnal(rng: random.Random, start: float, rate: float, users: int, ips: int,
+            amplitude: float = 0.8, fail_ratio: float = 0.05) -> Iterator[Event]:
+    """Tráfego legítimo: Poisson com taxa rate*(1 + amplitude*sin(...)) por hora do dia (thinning)."""
+    peak = rate * (1 + amplitude)
+    t = start
+    while True:
+        t += rng.expovariate(peak)
+        hour = (t % 86400) / 3600
+        if rng.random() * (1 + amplitude) > 1 + amplitude * math.sin(2 * math.pi * (hour - 9) / 24):
+            continue
+        u = rng.randrange(users)
+        ip = _ip(10, 0, u * 2654435761 % ips)  # cada utilizador entra quase sempre do mesmo IP
+        r = rng.random()
+        if r >= fail_ratio:
+            yield t, user_name(u), ip, "success"
+        elif r >= fail_ratio / 5:
+            yield t, user_name(u), ip, "fail_bad_pwd"
+        else:
+            yield t, user_name(u) + "x", ip, "fail_no_user"
+
+
+def _sessions(rng: random.Random, start: float, session_rate: float,
+              make: Callable[[float, int], List[Event]]) -> Iterator[Event]:
+    # Sessões (listas ordenadas de eventos) que começam num processo de Poisson e podem
+    # sobrepor-se; só se emite um evento quando já não pode aparecer nenhum mais antigo
+    heap: List[Tuple[float, int, Event]] = []
+    seq = 0
+    session = 0
+    next_start = start + rng.expovariate(session_rate)
+    while True:
+        while not heap or next_start <= heap[0][0]:
+            for ev in make(next_start, session):
+                heapq.heappush(heap, (ev[0], seq, ev))
+                seq += 1
+            session += 1
+            next_start += rng.expovariate(session_rate)
+        yield heapq.heappop(heap)[2]
+
+
+def bursts(rng: random.Random, start: float, rate: float, users: int) -> Iterator[Event]:
+    """Rajadas de força bruta: BURST_SIZE falhas de um IP contra poucas contas, em menos de 5 min."""
+    def make(t: float, k: int) -> List[Event]:
+        ip = _ip(172, 16, rng.randrange(1 << 20))
+        targets = [user_name(rng.randrange(users)) for _ in range(3)]
+        out = []
+        for _ in range(BURST_SIZE):
+            out.append((t, rng.choice(targets), ip, "fail_bad_pwd"))
+            t += rng.uniform(*BURST_GAP)
+        return out
+    return _sessions(rng, start, rate / BURST_SIZE, make)
+
+
+def sprays(rng: random.Random, start: float, rate: float, users: int) -> Iterator[Event]:
+    """Username spraying: um IP tenta SPRAY_SIZE utilizadores diferentes (reais e inventados)."""
+    def make(t: float, k: int) -> List[Event]:
+        ip = _ip(198, 18, rng.randrange(1 << 17))
+        out = []
+        for i in range(SPRAY_SIZE):
+            if i % 2:
+                out.append((t, user_name(rng.randrange(users)), ip, "fail_bad_pwd"))
+            else:
+                out.append((t, f"{SPRAY_NAMES[i % len(SPRAY_NAMES)]}{k}", ip, "fail_no_user"))
+            t += rng.uniform(*SPRAY_GAP)
+        return out
+    return _sessions(rng, start, rate / SPRAY_SIZE, make)
+
+
+def slow_low(rng: random.Random, start: float, rate: float, users: int,
+             per_day: int = SLOWLOW_PER_DAY) -> Iterator[Event]:
+    """Atacantes lentos: A IPs à vez (round-robin), cada um com ~per_day falhas espaçadas por 24h."""
+    attackers = max(1, round(rate * 86400 / per_day))
+    targets = [user_name(rng.randrange(users)) for _ in range(attackers)] if attackers <= 1 << 16 else None
+    t = start
+    k = 0
+    while True:
+        t += rng.uniform(0.5, 1.5) / rate
+        a = k % attackers
+        user = targets[a] if targets else user_name(a * 40503 % users)
+        yield t, user, _ip(100, 64, a), "fail_bad_pwd"
+        k += 1
+
+
+COMPONENTS = {"diurnal": diurnal, "bursts": bursts, "slowlow": slow_low, "spray": sprays}
+
+
+def parse_start(text: str) -> float:
+    if text == "now":
+        return time.time()
+    dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def generate(profile: str = "mixed", rate: float = 100.0, start: float = None, seed: int = 0,
+             users: int = 10_000, ips: int = 5_000) -> Iterator[Event]:
+    """Fluxo infinito de eventos por ordem temporal (cortar com islice ou por tempo)."""
+    if start is None:
+        start = parse_start(DEFAULT_START)
+    streams = []
+    for name, share in PROFILES[profile].items():
+        rng = random.Random(f"{seed}:{name}")  # uma semente por componente: perfis reprodutíveis
+        if name == "diurnal":
+            streams.append(diurnal(rng, start, rate * share, users, ips))
+        else:
+            streams.append(COMPONENTS[name](rng, start, rate * share, users))
+    return heapq.merge(*streams, key=lambda ev: ev[0])
+
+
+# ---------------- escrita ----------------
+
+SCHEMAS = {
+    # campos, formato do timestamp (strftime em UTC), microssegundos?, resultados
+    "projecto": (("timestamp", "username", "ip", "result"), "%Y-%m-%dT%H:%M:%S", True,
+                 {"success": "success", "fail_bad_pwd": "fail_bad_pwd", "fail_no_user": "fail_no_user"}),
+    "final": (("timestamp", "username", "ip", "result"), "%Y-%m-%d %H:%M:%S+0000", False,
+              {"success": "SUCCESS", "fail_bad_pwd": "FAIL", "fail_no_user": "FAIL"}),
+    "analisador": (("timestamp", "ip", "user", "status"), "%Y-%m-%dT%H:%M:%SZ", False,
+                   {"success": "success", "fail_bad_pwd": "fail", "fail_no_user": "fail"}),
+}
+FORMATS = ("csv", "json", "jsonl", "pipe")
+
+
+def format_for(path: str) -> str:
+    # Como read_lines_auto: pela extensão; o pipe só se for pedido
+    lower = path.lower()
+    if lower.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if lower.endswith(".json"):
+        return "json"
+    return "csv"
+
+
+def _row_formatter(schema: str, fmt: str) -> Callable[[Event], str]:
+    fields, ts_fmt, micro, results = SCHEMAS[schema]
+    last = [None, ""]  # eventos ordenados: o strftime só corre uma vez por segundo
+
+    def ts_of(t: float) -> str:
+        sec = int(t)
+        if sec != last[0]:
+            last[0], last[1] = sec, time.strftime(ts_fmt, time.gmtime(sec))
+        return f"{last[1]}.{int((t - sec) * 1e6):06d}" if micro else last[1]
+
+    order = [("timestamp", "username", "user", "ip", "result", "status").index(f) for f in fields]
+    if fmt in ("json", "jsonl"):
+        # Os valores gerados (nomes, IPs, timestamps) não têm nada a escapar em JSON
+        template = "{" + ", ".join(f'"{f}": "%s"' for f in fields) + "}"
+    else:
+        template = ("," if fmt == "csv" else "|").join("%s" for _ in fields)
+
+    def row(ev: Event) -> str:
+        t, user, ip, res = ev
+        vals = (ts_of(t), user, user, ip, results[res], results[res])
+        return template % tuple(vals[i] for i in order)
+    return row
+
+
+def write_events(events: Iterator[Event], out, fmt: str = "csv", schema: str = "analisador",
+                 throttle: Optional[float] = None) -> int:
+    """Escreve os eventos em `out` (ficheiro de texto) por lotes; devolve o nº de linhas.
+
+    throttle: máximo de linhas por segundo de relógio (para alimentar quem lê o
+    log em tempo real); cada lote é despejado logo.
+    """
+    fields = SCHEMAS[schema][0]
+    row = _row_formatter(schema, fmt)
+    if fmt == "csv":
+        out.write(",".join(fields) + "\n")
+    elif fmt == "pipe":
+        out.write("|".join(fields) + "\n")
+    elif fmt == "json":
+        out.write("[\n")
+    sep = ",\n" if fmt == "json" else "\n"
+    batch = BATCH if not throttle else max(1, min(BATCH, int(throttle / 10)))
+    n = 0
+    t0 = time.monotonic()
+    events = iter(events)
+    while True:
+        lines = [row(ev) for ev in islice(events, batch)]
+        if not lines:
+            break
+        if fmt == "json" and n:
+            out.write(sep)
+        out.write(sep.join(lines))
+        if fmt != "json":
+            out.write("\n")
+        n += len(lines)
+        if throttle:
+            out.flush()
+            delay = t0 + n / throttle - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    if fmt == "json":
+        out.write("\n]\n")
+    return n
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Gerador de logs sintéticos em streaming (perfis de ataque).")
+    p.add_argument("-o", "--output", default="-", help="ficheiro de saída ('-' = stdout)")
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--hours", type=float, help="para também ao fim deste tempo de log")
+    p.add_argument("--profile", choices=sorted(PROFILES), default="mixed")
+    p.add_argument("--rate", type=float, default=100.0, help="eventos por segundo de tempo do log")
+    p.add_argument("--start", default=DEFAULT_START, help="início do log (ISO-8601 ou 'now')")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--users", type=int, default=10_000)
+    p.add_argument("--ips", type=int, default=5_000, help="IPs dos utilizadores legítimos")
+    p.add_argument("--schema", choices=sorted(SCHEMAS), default="analisador")
+    p.add_argument("--format", choices=FORMATS, help="por omissão, pela extensão do ficheiro")
+    p.add_argument("--throttle", type=float, help="máximo de linhas por segundo de relógio")
+    args = p.parse_args(argv)
+
+    start = parse_start(args.start)
+    events = generate(args.profile, args.rate, start, args.seed, args.users, args.ips)
+    if args.hours is not None:
+        end = start + args.hours * 3600
+        events = takewhile(lambda ev: ev[0] < end, events)
+    events = islice(events, args.rows)
+    fmt = args.format or format_for(args.output)
+
+    t0 = time.perf_counter()
+    if args.output == "-":
+        n = write_events(events, sys.stdout, fmt, args.schema, args.throttle)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            n = write_events(events, f, fmt, args.schema, args.throttle)
+    elapsed = time.perf_counter() - t0
+    print(f"Gerados {n} registos ({fmt}, {args.schema}) em {args.output} "
+          f"[{n / elapsed if elapsed else 0:,.0f} linhas/s]", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Motor de regras de janela deslizante partilhado pelos analisadores de logs.
+
+Cada regra é um dicionário declarativo:
+
+    {"name": "short_bruteforce", "count": 10, "window": 300,
+     "action": "temp", "block_secs": 3600}
+    {"name": "scattered_users", "count": 5, "window": 600, "distinct": "user",
+     "action": "temp", "block_secs": 3600}
+
+- `count`: limiar de eventos (ou de valores distintos de `distinct`);
+- `window`: janela em segundos (o evento i conta se ts_atual - ts_i <= window);
+- `distinct`: campo cujo número de valores distintos na janela é comparado com `count`;
+- `action`: "temp" (bloqueio de `block_secs` segundos) ou "perm".
+
+O motor percorre os eventos (ordenados por tempo dentro de cada chave) uma
+única vez e avalia todas as regras em simultâneo. Uma regra que dispara para
+uma chave fica disparada e a sua janela deixa de ser mantida. O estado guardado
+por chave é compacto: no máximo `count - 1` entradas por regra, pelo que pode
+ser exportado/importado para análise incremental.
+"""
+from __future__ import annotations
+import hashlib
+import json
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"name": "short_bruteforce", "count": 10, "window": 5 * 60, "action": "temp", "block_secs": 60 * 60},
+    {"name": "long_bruteforce", "count": 30, "window": 24 * 3600, "action": "perm"},
+    {"name": "scattered_users", "count": 5, "window": 10 * 60, "distinct": "user",
+     "action": "temp", "block_secs": 60 * 60},
+]
+
+ACTIONS = ("temp", "perm")
+
+
+class OutOfOrderError(ValueError):
+    """Evento mais antigo do que o último já processado para a mesma chave."""
+
+
+def normalize_rule(rule: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        out = {
+            "name": str(rule["name"]),
+            "count": int(rule["count"]),
+            "window": float(rule["window"]),
+            "distinct": rule.get("distinct") or None,
+            "action": rule["action"],
+            "block_secs": int(rule.get("block_secs", 0)),
+        }
+    except KeyError as e:
+        raise ValueError(f"Regra sem o campo obrigatório {e}: {rule}") from None
+    if out["action"] not in ACTIONS:
+        raise ValueError(f"Ação desconhecida '{out['action']}' na regra {out['name']}")
+    if out["count"] < 1 or out["window"] < 0:
+        raise ValueError(f"Limiar/janela inválidos na regra {out['name']}")
+    if out["action"] == "temp" and out["block_secs"] <= 0:
+        raise ValueError(f"Regra temporária {out['name']} sem block_secs")
+    return out
+
+
+def load_rules(path: str | Path, default: Sequence[Dict[str, Any]] = DEFAULT_RULES) -> List[Dict[str, Any]]:
+    """Lê as regras de um ficheiro JSON (lista de regras); usa `default` se não existir."""
+    p = Path(path)
+    if not p.exists():
+        return [normalize_rule(r) for r in default]
+    with p.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("rules", [])
+    return [normalize_rule(r) for r in data]
+
+
+def _human_window(secs: float) -> str:
+    secs = int(secs)
+    if secs and secs % 3600 == 0:
+        return f"{secs // 3600}h"
+    if secs and secs % 60 == 0:
+        return f"{secs // 60}m"
+    return f"{secs}s"
+
+
+def describe_rule(rule: Dict[str, Any]) -> str:
+    # ex.: ">=10 fails/5m", ">=5 users/10m"
+    what = f"{rule['distinct']}s" if rule.get("distinct") else "fails"
+    return f">={rule['count']} {what}/{_human_window(rule['window'])}"
+
+
+def rules_fingerprint(rules: Sequence[Dict[str, Any]]) -> str:
+    blob = json.dumps([normalize_rule(r) for r in rules], sort_keys=True)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+class _KeyState:
+    __slots__ = ("last", "fired", "windows")
+
+    def __init__(self, n_rules: int):
+        self.last: Optional[float] = None
+        self.fired: set = set()
+        self.windows: List[Any] = [None] * n_rules
+
+
+class RuleEngine:
+    """Avalia N regras de janela deslizante numa só passagem.
+
+    `fields` indica a ordem dos valores passados a feed(); as regras com
+    `distinct` referem-se a um destes nomes. `max_lateness`: um evento até
+    tantos segundos mais antigo do que o último da mesma chave conta como
+    chegado no instante desse último, em vez de dar OutOfOrderError.
+    """
+
+    def __init__(self, rules: Sequence[Dict[str, Any]] = DEFAULT_RULES, fields: Sequence[str] = ("user",),
+                 max_lateness: float = 0.0):
+        self.rules = [normalize_rule(r) for r in rules]
+        self.fields = tuple(fields)
+        self.max_lateness = max_lateness
+        self._distinct_idx: List[Optional[int]] = []
+        for r in self.rules:
+            if r["distinct"] is None:
+                self._distinct_idx.append(None)
+            elif r["distinct"] in self.fields:
+                self._distinct_idx.append(self.fields.index(r["distinct"]))
+            else:
+                raise ValueError(f"Campo '{r['distinct']}' da regra {r['name']} não existe em {self.fields}")
+        self.state: Dict[str, _KeyState] = {}
+
+    def feed(self, key: str, ts: float, values: Sequence[Any] = ()) -> List[Dict[str, Any]]:
+        """Processa um evento; devolve as regras que dispararam agora para `key`."""
+        st = self.state.get(key)
+        if st is None:
+            st = self.state[key] = _KeyState(len(self.rules))
+        if len(st.fired) == len(self.rules):
+            if st.last is None or ts > st.last:
+                st.last = ts  # sem janelas a manter, mas o prune precisa de saber que continua ativa
+            return []
+        if st.last is not None and ts < st.last:
+            if st.last - ts > self.max_lateness:
+                raise OutOfOrderError(f"{key}: evento {ts} anterior a {st.last}")
+            ts = st.last
+        st.last = ts
+        fired_now = []
+        for idx, rule in enumerate(self.rules):
+            if idx in st.fired:
+                continue
+            window = rule["window"]
+            win = st.windows[idx]
+            d = self._distinct_idx[idx]
+            if d is None:
+                # contagem: timestamps dentro da janela
+                if win is None:
+                    win = st.windows[idx] = deque()
+                while win and ts - win[0] > window:
+                    win.popleft()
+                win.append(ts)
+            else:
+                # distintos: último ts de cada valor, por ordem de último acesso
+                if win is None:
+                    win = st.windows[idx] = OrderedDict()
+                v = values[d]
+                win[v] = ts
+                win.move_to_end(v)
+                while True:
+                    oldest = next(iter(win))
+                    if ts - win[oldest] > window:
+                        del win[oldest]
+                    else:
+                        break
+            if len(win) >= rule["count"]:
+                st.fired.add(idx)
+                st.windows[idx] = None
+                fired_now.append(rule)
+        return fired_now
+
+    def fired(self, key: str) -> List[Dict[str, Any]]:
+        st = self.state.get(key)
+        if st is None:
+            return []
+        return [self.rules[i] for i in sorted(st.fired)]
+
+    def fired_items(self) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """(chave, regras disparadas por ordem de declaração) para as chaves com disparos."""
+        for key, st in self.state.items():
+            if st.fired:
+                yield key, [self.rules[i] for i in sorted(st.fired)]
+
+    def prune(self, drop_fired: bool = False) -> int:
+        """Esquece as chaves cujas janelas já expiraram todas; devolve quantas.
+
+        Uma chave cujo último evento é anterior a (evento mais recente - maior
+        janela) já não conta para nenhuma regra nos eventos seguintes, por ordem
+        temporal. Sem disparos, o resultado não muda. As chaves com disparos
+        ficam, para quem volta a aplicar fired_items() a cada execução; com
+        drop_fired=True também saem (o bloqueio já foi aplicado e um evento
+        novo dessa chave volta a ser avaliado do zero) e o estado fica limitado
+        às chaves ativas na maior janela.
+        """
+        lasts = [st.last for st in self.state.values() if st.last is not None]
+        if not lasts or not self.rules:
+            return 0
+        before = max(lasts) - max(r["window"] for r in self.rules)
+        stale = [k for k, st in self.state.items()
+                 if (drop_fired or not st.fired) and st.last is not None and st.last < before]
+        for key in stale:
+            del self.state[key]
+        return len(stale)
+
+    # --------------------- Persistência do estado ---------------------
+
+    def export_state(self) -> Dict[str, Any]:
+        keys: Dict[str, Any] = {}
+        for key, st in self.state.items():
+            wins = {}
+            for idx, win in enumerate(st.windows):
+                if not win:
+                    continue
+                name = self.rules[idx]["name"]
+                wins[name] = list(win) if self._distinct_idx[idx] is None else [[v, t] for v, t in win.items()]
+            keys[key] = {
+                "last": st.last,
+                "fired": [self.rules[i]["name"] for i in sorted(st.fired)],
+                "win": wins,
+            }
+        return {"rules": rules_fingerprint(self.rules), "keys": keys}
+
+    def load_state(self, data: Dict[str, Any]) -> bool:
+        """Repõe o estado exportado; devolve False se as regras mudaram entretanto."""
+        if not data or data.get("rules") != rules_fingerprint(self.rules):
+            return False
+        index = {r["name"]: i for i, r in enumerate(self.rules)}
+        self.state = {}
+        for key, ks in data.get("keys", {}).items():
+            st = _KeyState(len(self.rules))
+            st.last = ks.get("last")
+            st.fired = {index[n] for n in ks.get("fired", [])}
+            for name, entries in ks.get("win", {}).items():
+                idx = index[name]
+                if self._distinct_idx[idx] is None:
+                    st.windows[idx] = deque(entries)
+                else:
+                    st.windows[idx] = OrderedDict((v, t) for v, t in entries)
+            self.state[key] = st
+        return True
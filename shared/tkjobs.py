@@ -0,0 +1,109 @@
+"""Trabalho pesado fora do thread do Tkinter (worker thread + polling com after()).
+
+O Tk não é thread-safe: só o thread do mainloop pode mexer nos widgets. Um
+`BackgroundJob` corre fn(*args) num thread à parte e o próprio mainloop vai
+consultando (widget.after, a cada `interval_ms`) se já acabou; os callbacks
+correm sempre no thread do Tk, pelo que podem atualizar a interface.
+
+    job = BackgroundJob(root, authenticate, user, pwd,
+                        on_done=lambda res: ..., on_error=lambda exc: ...,
+                        on_progress=lambda secs: status.set(f"A autenticar... {secs:.1f}s"))
+    job.start()
+    job.cancel()   # a janela volta logo a responder; o resultado é descartado
+
+Cancelar não interrompe fn (um PBKDF2 a meio não se pode parar): o thread
+termina sozinho e o resultado é ignorado, mas os efeitos de fn (p.ex. uma
+falha contada para o lockout) ficam. on_cancelled é chamado quando o thread
+de um trabalho cancelado termina, para a interface só deixar começar outro
+depois disso. Estados: "idle", "running", "done", "failed", "cancelled".
+"""
+from __future__ import annotations
+import threading
+import time
+from typing import Any, Callable, Optional
+
+POLL_MS = 50
+
+
+class BackgroundJob:
+    def __init__(self, widget, fn: Callable[..., Any], *args,
+                 on_done: Optional[Callable[[Any], None]] = None,
+                 on_error: Optional[Callable[[BaseException], None]] = None,
+                 on_progress: Optional[Callable[[float], None]] = None,
+                 on_cancelled: Optional[Callable[[], None]] = None,
+                 interval_ms: int = POLL_MS):
+        self.widget = widget
+        self.fn = fn
+        self.args = args
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancelled = on_cancelled
+        self.interval_ms = interval_ms
+        self.state = "idle"
+        self._result: Any = None
+        self._error: Optional[BaseException] = None
+        self._finished = threading.Event()
+        self._started_at = 0.0
+        self._after_id = None
+
+    @property
+    def running(self) -> bool:
+        return self.state == "running"
+
+    @property
+    def finished(self) -> bool:
+        """O thread de trabalho já terminou (também depois de cancel)."""
+        return self._finished.is_set()
+
+    def start(self) -> "BackgroundJob":
+        if self.state != "idle":
+            raise RuntimeError("BackgroundJob só pode ser iniciado uma vez")
+        self.state = "running"
+        self._started_at = time.monotonic()
+        threading.Thread(target=self._work, name="tk-job", daemon=True).start()
+        self._after_id = self.widget.after(self.interval_ms, self._poll)
+        return self
+
+    def cancel(self) -> None:
+        if self.state != "running":
+            return
+        self.state = "cancelled"
+        if self.on_cancelled is None and self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _work(self) -> None:
+        # Thread de trabalho: não toca em widgets
+        try:
+            self._result = self.fn(*self.args)
+        except BaseException as exc:  # entregue a on_error no thread do Tk
+            self._error = exc
+        self._finished.set()
+
+    def _poll(self) -> None:
+        self._after_id = None
+        if self.state == "cancelled":
+            # Só se continua a consultar por causa de on_cancelled
+            if self._finished.is_set():
+                self.on_cancelled()
+            else:
+                self._after_id = self.widget.after(self.interval_ms, self._poll)
+            return
+        if self.state != "running":
+            return
+        if not self._finished.is_set():
+            if self.on_progress:
+                self.on_progress(time.monotonic() - self._started_at)
+            self._after_id = self.widget.after(self.interval_ms, self._poll)
+            return
+        if self._error is not None:
+            self.state = "failed"
+            if self.on_error:
+                self.on_error(self._error)
+            else:
+                raise self._error
+        else:
+            self.state = "done"
+            if self.on_done:
+                self.on_done(self._result)
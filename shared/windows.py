@@ -0,0 +1,147 @@
+"""Deteção vetorizada (NumPy) das regras de janela deslizante.
+
+Alternativa ao RuleEngine para reavaliar um log completo que já está em
+colunas (EventTable): os eventos são ordenados uma vez por (chave, ts) e, para
+cada evento, `np.searchsorted` dá o início da sua janela e portanto o nº de
+eventos da mesma chave nos últimos `window` segundos. Uma regra de contagem
+dispara para uma chave se algum evento tiver contagem >= `count`.
+
+As regras com `distinct` não se vetorizam da mesma forma; como o nº de valores
+distintos numa janela nunca excede o nº de eventos, só as chaves cuja contagem
+atinge o limiar (e com valores distintos suficientes no total) são
+reavaliadas pelo RuleEngine, até ao primeiro disparo.
+
+O resultado é igual ao do RuleEngine alimentado pela ordem temporal estável,
+incluindo a ordem das chaves (a do primeiro evento de cada uma).
+
+    fired = detect_table(table, fail_codes, rules)   # chave = código do IP
+    for ip_code, (rules_fired, last_ts) in fired.items(): ...
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from shared.columns import EventTable, _np_col, _np_mask
+from shared.rules import RuleEngine, normalize_rule
+
+
+def sort_by_key(keys, ts):
+    """Índices que ordenam por (chave, ts); empates mantêm a ordem original."""
+    n = len(ts)
+    if not n or keys.dtype.kind not in "iu" or (int(keys.max()) - int(keys.min()) + 1) * n >= 2 ** 62:
+        return np.lexsort((ts, keys))
+    # Chave inteira e posição na ordem temporal num só int64: ordenar os valores
+    # é muito mais rápido do que lexsort/argsort e a posição devolve a permutação
+    by_ts = np.argsort(ts, kind="stable")
+    rank = np.empty(n, dtype=np.int64)
+    rank[by_ts] = np.arange(n)
+    packed = (keys.astype(np.int64) - int(keys.min())) * n + rank
+    packed.sort()
+    return by_ts[packed % n]
+
+
+def window_counts(keys, ts, window: float):
+    """Para cada evento (já ordenado por chave, ts): nº de eventos da mesma chave com ts_atual - ts_i <= window."""
+    if not len(ts):
+        return np.zeros(0, dtype=np.int64)
+    group, starts = _groups(keys)
+    return np.arange(len(ts)) - _window_start(ts, group, starts[group], window) + 1
+
+
+def _groups(keys):
+    # (índice do grupo de cada evento, posição do 1.º evento de cada grupo)
+    new_group = np.concatenate(([True], keys[1:] != keys[:-1]))
+    return np.cumsum(new_group) - 1, np.flatnonzero(new_group)
+
+
+def _window_start(ts, group, start, window: float):
+    # Tempo relativo ao início do grupo (subtração exata) + deslocamento por
+    # grupo maior do que qualquer janela: um só array crescente para searchsorted
+    rel = ts - ts[start]
+    stride = float(np.ceil(rel.max() + window)) + 1.0
+    flat = rel + group * stride
+    lo = np.searchsorted(flat, flat - window, side="left")
+    lo = np.maximum(lo, start)
+    # Correção de arredondamento: a condição de referência é ts_j - ts_i <= window
+    while True:
+        back = (lo > start) & (ts - ts[np.maximum(lo - 1, 0)] <= window)
+        fwd = ts - ts[lo] > window
+        if not back.any() and not fwd.any():
+            return lo
+        lo = lo - back + fwd
+
+
+def detect(keys, ts, rules: Sequence[Dict[str, Any]], values: Sequence[Any] = (),
+           fields: Sequence[str] = ("user",)) -> Dict[Any, Tuple[List[Dict[str, Any]], float]]:
+    """{chave: (regras disparadas por ordem de declaração, último ts)} para as chaves com disparos.
+
+    keys/ts/values: colunas alinhadas (arrays NumPy ou array.array), uma linha
+    por evento relevante (p.ex. só as falhas), em qualquer ordem.
+    """
+    rules = [normalize_rule(r) for r in rules]
+    keys, ts = np.asarray(keys), np.asarray(ts, dtype=np.float64)
+    if not len(ts):
+        return {}
+    order = sort_by_key(keys, ts)
+    k, t = keys[order], ts[order]
+    cols = [np.asarray(v)[order] for v in values]
+
+    group, starts = _groups(k)
+    start = starts[group]
+    ends = np.append(starts[1:], len(k))
+    pos = np.arange(len(k))
+
+    hits: List[Any] = []
+    counts_cache: Dict[float, Any] = {}
+    for rule in rules:
+        w = rule["window"]
+        if w not in counts_cache:
+            counts_cache[w] = pos - _window_start(t, group, start, w) + 1
+        reached = np.zeros(len(starts), dtype=bool)
+        reached[group[counts_cache[w] >= rule["count"]]] = True
+        if rule["distinct"] is not None:
+            reached = _distinct_hits(rule, fields, cols, k, t, starts, ends, reached)
+        hits.append(reached)
+
+    any_hit = np.logical_or.reduce(hits)
+    # Ordem das chaves: a do primeiro evento de cada uma (ts e depois posição original)
+    first = order[starts]
+    gidx = np.flatnonzero(any_hit)
+    gidx = gidx[np.lexsort((first[gidx], ts[first[gidx]]))]
+    out: Dict[Any, Tuple[List[Dict[str, Any]], float]] = {}
+    for g in gidx.tolist():
+        fired = [rule for rule, h in zip(rules, hits) if h[g]]
+        out[k[starts[g]].item()] = (fired, t[ends[g] - 1].item())
+    return out
+
+
+def detect_table(table: EventTable, codes, rules: Sequence[Dict[str, Any]]) -> Dict[int, Tuple[List[Dict[str, Any]], float]]:
+    """detect() sobre as linhas da tabela com resultado em `codes`: chave = código do IP, campo "user"."""
+    m = _np_mask(table.result, codes)
+    return detect(_np_col(table.ip)[m], _np_col(table.ts)[m], rules, values=(_np_col(table.user)[m],))
+
+
+def _distinct_hits(rule, fields, cols, k, t, starts, ends, candidates):
+    # Reavalia só as chaves candidatas com o RuleEngine (uma regra)
+    if rule["distinct"] not in fields:
+        raise ValueError(f"Campo '{rule['distinct']}' da regra {rule['name']} não existe em {tuple(fields)}")
+    col = cols[list(fields).index(rule["distinct"])]
+    # Também é preciso haver >= count valores distintos na chave como um todo
+    m = np.repeat(candidates, ends - starts)
+    if m.any():
+        group = np.repeat(np.arange(len(starts)), ends - starts)[m]
+        nv = int(col[m].max()) + 1
+        pairs = group.astype(np.int64) * nv + col[m]
+        pairs.sort()
+        pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))]
+        candidates = candidates & (np.bincount(pairs // nv, minlength=len(starts)) >= rule["count"])
+    out = np.zeros(len(starts), dtype=bool)
+    for g in np.flatnonzero(candidates).tolist():
+        engine = RuleEngine([rule], fields=(rule["distinct"],))
+        s, e = starts[g], ends[g]
+        for ts_i, v in zip(t[s:e].tolist(), col[s:e].tolist()):
+            if engine.feed(g, ts_i, (v,)):
+                out[g] = True
+                break
+    return out